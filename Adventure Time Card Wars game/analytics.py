@@ -0,0 +1,241 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from card_data import CARDS
+from telemetry import (ACTORS, BRANCH, DIFFICULTIES, FILE_MAGIC, HISTORY_EVENTS, MATCH_END, MODES, PLAY, RECORD,
+                       REDO, SKIP, UNDO)
+
+# Поля в том же порядке и с теми же размерами, что и telemetry.RECORD
+EVENT_DTYPE = np.dtype([
+    ("match_id", "<u8"), ("seq", "<u2"), ("event", "u1"), ("actor", "u1"),
+    ("card", "i1"), ("slot", "i1"), ("drawn", "i1"), ("turn", "<u2"),
+    ("player_health", "i1"), ("opponent_health", "i1"), ("mana", "i1"),
+    ("mode", "u1"), ("difficulty", "u1"), ("time", "<u4"),
+])
+assert EVENT_DTYPE.itemsize == RECORD.size
+
+DEFAULT_LOGS = os.path.join("telemetry", "*.bin")
+DEFAULT_STORE = "telemetry_store"
+CHUNK = 1 << 20
+
+
+def convert(paths, store=DEFAULT_STORE):
+    """Переложить журналы в столбцы: по файлу .npy на поле, каждый открывается через mmap"""
+    sources = []
+    for path in paths:
+        with open(path, "rb") as f:
+            if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                print(f"Пропущен файл не того формата: {path}")
+                continue
+        # Недописанный хвост последней записи отбрасываем
+        count = (os.path.getsize(path) - len(FILE_MAGIC)) // RECORD.size
+        if count:
+            sources.append((path, count))
+    total = sum(count for _, count in sources)
+
+    os.makedirs(store, exist_ok=True)
+    columns = {
+        name: np.lib.format.open_memmap(os.path.join(store, name + ".npy"), mode="w+",
+                                        dtype=EVENT_DTYPE[name], shape=(total,))
+        for name in EVENT_DTYPE.names
+    }
+    pos = 0
+    for path, count in sources:
+        records = np.memmap(path, dtype=EVENT_DTYPE, mode="r", offset=len(FILE_MAGIC), shape=(count,))
+        for start in range(0, count, CHUNK):
+            block = records[start:start + CHUNK]
+            for name, column in columns.items():
+                column[pos:pos + len(block)] = block[name]
+            pos += len(block)
+        del records
+    for column in columns.values():
+        column.flush()
+
+    meta = {"records": total, "files": len(sources), "cards": [c.name for c in CARDS],
+            "actors": ACTORS, "modes": MODES, "difficulties": DIFFICULTIES}
+    with open(os.path.join(store, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return total
+
+
+def open_store(store=DEFAULT_STORE):
+    with open(os.path.join(store, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    columns = {name: np.load(os.path.join(store, name + ".npy"), mmap_mode="r") for name in EVENT_DTYPE.names}
+    return meta, columns
+
+
+def _final_line(events, cards, slots):
+    """Строки PLAY, лежащие на последней линии партии в дереве истории.
+
+    Дерево восстанавливается так же, как его строит history.History: ход и пропуск
+    добавляют потомка (повтор того же хода идёт в уже существующую ветку),
+    отмена, повтор и переключение ветки перемещают текущий узел.
+    """
+    root = current = {"parent": None, "children": [], "branch": 0, "row": -1, "key": None}
+    for row, (event, card, slot) in enumerate(zip(events, cards, slots)):
+        if event in (PLAY, SKIP):
+            key = (event, card, slot)
+            for i, child in enumerate(current["children"]):
+                if child["key"] == key:
+                    child["row"] = row
+                    break
+            else:
+                child = {"parent": current, "children": [], "branch": 0, "row": row, "key": key}
+                current["children"].append(child)
+                i = len(current["children"]) - 1
+            current["branch"] = i
+            current = child
+        elif event == UNDO:
+            current = current["parent"] or current
+        elif event == REDO:
+            if current["children"]:
+                current = current["children"][current["branch"]]
+        elif event == BRANCH:
+            parent = current["parent"]
+            if parent is not None and len(parent["children"]) > 1:
+                # Для BRANCH в поле card записан шаг
+                siblings = parent["children"]
+                parent["branch"] = (siblings.index(current) + card) % len(siblings)
+                current = siblings[parent["branch"]]
+    rows = []
+    while current is not root:
+        if current["key"][0] == PLAY:
+            rows.append(current["row"])
+        current = current["parent"]
+    return rows
+
+
+def card_play_rates(columns, n_cards):
+    """Сколько раз разыграна каждая карта; ходы, отменённые по истории, не считаются"""
+    event = columns["event"]
+    ids = columns["match_id"]
+    keep = event == PLAY
+    rewound = np.unique(ids[np.isin(event, HISTORY_EVENTS)])
+    if len(rewound):
+        # Дерево истории разбираем только для партий с переходами; их события лежат подряд
+        rows = np.flatnonzero(np.isin(ids, rewound))
+        keep[rows] = False
+        starts = np.sort(np.unique(ids[rows], return_index=True)[1])
+        bounds = np.append(starts, len(rows))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            span = rows[start:end]
+            keep[span[_final_line(event[span].tolist(), columns["card"][span].tolist(),
+                                  columns["slot"][span].tolist())]] = True
+    cards = columns["card"][keep]
+    counts = np.bincount(cards[cards >= 0], minlength=n_cards)
+    return counts, counts / max(counts.sum(), 1)
+
+
+def _last_by_match(ids, rows):
+    """Последняя из строк rows для каждой партии: отсортированные id и номера строк"""
+    rows = rows[::-1]
+    unique_ids, first = np.unique(ids[rows], return_index=True)
+    return unique_ids, rows[first]
+
+
+def match_results(columns):
+    """Итоги доигранных партий: id, победитель, число ходов, режим, сложность.
+
+    Если после конца партии ходы отменяли, считается только конец, записанный
+    после последнего перехода по истории; без него партия не доиграна.
+    """
+    ids = columns["match_id"]
+    event = columns["event"]
+    end_ids, ends = _last_by_match(ids, np.flatnonzero(event == MATCH_END))
+    history_ids, history = _last_by_match(ids, np.flatnonzero(np.isin(event, HISTORY_EVENTS)))
+    if len(history_ids) and len(end_ids):
+        # События партии лежат подряд, поэтому порядок строк — порядок событий
+        at = np.minimum(np.searchsorted(history_ids, end_ids), len(history_ids) - 1)
+        undone = (history_ids[at] == end_ids) & (history[at] > ends)
+        end_ids, ends = end_ids[~undone], ends[~undone]
+    return (end_ids, columns["actor"][ends], columns["turn"][ends],
+            columns["mode"][ends], columns["difficulty"][ends])
+
+
+def win_rate_by_first_play(columns, n_cards):
+    """Доля побед игрока 1 в зависимости от первой сыгранной им карты.
+
+    Партии, где историю отматывали до самого начала, пропускаются: их первый ход мог смениться.
+    """
+    plays = np.flatnonzero((columns["event"] == PLAY) & (columns["actor"] == ACTORS.index("player")))
+    # События партии лежат подряд по возрастанию seq, поэтому первое вхождение — первый ход
+    ids, first = np.unique(columns["match_id"][plays], return_index=True)
+    first_cards = columns["card"][plays[first]]
+    rewound = columns["match_id"][np.isin(columns["event"], HISTORY_EVENTS) & (columns["slot"] == 0)]
+    kept = ~np.isin(ids, rewound)
+    ids, first_cards = ids[kept], first_cards[kept]
+
+    end_ids, winners = match_results(columns)[:2]
+    if not len(end_ids):
+        return np.zeros(n_cards), np.zeros(n_cards)
+    at = np.minimum(np.searchsorted(end_ids, ids), len(end_ids) - 1)
+    finished = (end_ids[at] == ids) & (first_cards >= 0)
+    won = winners[at][finished] == ACTORS.index("player")
+    cards = first_cards[finished]
+    games = np.bincount(cards, minlength=n_cards)
+    wins = np.bincount(cards, weights=won, minlength=n_cards)
+    return games, wins / np.maximum(games, 1)
+
+
+def game_length_by_difficulty(columns):
+    """Средняя длина партии против бота (в ходах) по сложностям"""
+    _, _, turns, modes, difficulties = match_results(columns)
+    bot = modes == MODES.index("bot")
+    counts = np.bincount(difficulties[bot], minlength=256)
+    totals = np.bincount(difficulties[bot], weights=turns[bot], minlength=256)
+    return counts, totals / np.maximum(counts, 1)
+
+
+def report(store=DEFAULT_STORE):
+    start = time.perf_counter()
+    meta, columns = open_store(store)
+    cards = meta["cards"]
+    print(f"Событий: {meta['records']}")
+
+    counts, rates = card_play_rates(columns, len(cards))
+    print("\nЧастота розыгрыша карт:")
+    for i in np.argsort(-counts):
+        print(f"  {cards[i]:<24} {counts[i]:>10} {rates[i]:7.2%}")
+
+    games, win_rates = win_rate_by_first_play(columns, len(cards))
+    print("\nПобеды игрока 1 по первой сыгранной карте:")
+    for i in np.argsort(-win_rates):
+        if games[i]:
+            print(f"  {cards[i]:<24} {win_rates[i]:7.2%} из {games[i]} партий")
+
+    counts, lengths = game_length_by_difficulty(columns)
+    print("\nСредняя длина партии против бота:")
+    for i, name in enumerate(meta["difficulties"]):
+        if counts[i]:
+            print(f"  {name:<10} {lengths[i]:6.2f} ходов, {counts[i]} партий")
+
+    print(f"\nОтчёт за {time.perf_counter() - start:.2f} с")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Аналитика журналов телеметрии")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert_parser = sub.add_parser("convert", help="собрать журналы в столбцовое хранилище")
+    convert_parser.add_argument("logs", nargs="*", help=f"файлы журналов (по умолчанию {DEFAULT_LOGS})")
+    convert_parser.add_argument("--store", default=DEFAULT_STORE)
+    report_parser = sub.add_parser("report", help="частоты карт, победы по первому ходу, длина партий")
+    report_parser.add_argument("--store", default=DEFAULT_STORE)
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        start = time.perf_counter()
+        total = convert(args.logs or sorted(glob.glob(DEFAULT_LOGS)), args.store)
+        print(f"Записано {total} событий в {args.store} за {time.perf_counter() - start:.2f} с")
+    else:
+        report(args.store)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+MB = 1024 * 1024
+
+
+class AssetManager:
+    """Кэш загруженных поверхностей с бюджетом памяти и вытеснением по LRU.
+
+    Поверхность запрашивается по ключу вместе с функцией загрузки; если её нет
+    (ещё не грузили или вытеснили), она загружается заново. Группы позволяют
+    разом выгрузить то, что не видно на текущем экране, например фон меню во время партии.
+    """
+
+    def __init__(self, budget=24 * MB):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.groups = {}
+        self.usage = 0
+        self.loads = 0
+        self.evictions = 0
+
+    @staticmethod
+    def surface_bytes(surface):
+        return surface.get_pitch() * surface.get_height()
+
+    def get(self, key, loader, group=None):
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            return surface
+        surface = loader()
+        self.loads += 1
+        self.entries[key] = surface
+        self.sizes[key] = self.surface_bytes(surface)
+        self.groups[key] = group
+        self.usage += self.sizes[key]
+        self._evict(keep=key)
+        return surface
+
+    def _evict(self, keep):
+        # Только что загруженную поверхность не трогаем, даже если она одна больше бюджета
+        for key in list(self.entries):
+            if self.usage <= self.budget:
+                break
+            if key != keep:
+                self.discard(key)
+                self.evictions += 1
+
+    def discard(self, key):
+        if key in self.entries:
+            del self.entries[key]
+            self.usage -= self.sizes.pop(key)
+            del self.groups[key]
+
+    def release_group(self, group):
+        for key in [k for k, g in self.groups.items() if g == group]:
+            self.discard(key)
+
+    def report(self):
+        return (f"Текстуры: {self.usage / MB:.1f} из {self.budget / MB:.0f} МБ, "
+                f"{len(self.entries)} шт., загрузок {self.loads}, вытеснено {self.evictions}")
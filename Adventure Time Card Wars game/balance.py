@@ -0,0 +1,246 @@
+import argparse
+import inspect
+import json
+import math
+import os
+import random
+import sys
+import time
+import zlib
+from multiprocessing import Pool
+
+import simulation
+from card_data import CARDS, CardStats
+from simulation import Match, POLICIES
+
+# Пары (политика игрока, политика бота); обе рассадки каждой пары, чтобы вычесть преимущество места
+MATCHUPS = [(a, b) for a in POLICIES for b in POLICIES if a != b]
+MAX_ATTACK = 8
+MAX_COST = 10
+# Небольшой штраф за каждое изменение, чтобы предложения оставались близки к ручной настройке
+CHANGE_PENALTY = 0.002
+DEFAULT_CACHE = "balance_cache.json"
+DEFAULT_OUTPUT = "balance_proposals.json"
+
+BASELINE = tuple((c.attack, c.cost) for c in CARDS)
+
+
+def rules_checksum():
+    """Оценки в кэше годятся только для тех же правил симуляции, названий карт и пар политик"""
+    data = inspect.getsource(simulation) + repr([c.name for c in CARDS]) + repr(MATCHUPS)
+    return zlib.crc32(data.encode("utf-8"))
+
+
+def make_cards(stats):
+    return [CardStats(card.name, attack, cost) for card, (attack, cost) in zip(CARDS, stats)]
+
+
+def _play_batch(args):
+    """Сыграть пачку партий одной пары политик на наборе карт-кандидате"""
+    stats, matchup, games, seed = args
+    cards = make_cards(stats)
+    index = {c.name: i for i, c in enumerate(cards)}
+    plays = [0] * len(cards)
+
+    def counted(policy):
+        def choose(match, playable):
+            card = policy(match, playable)
+            if card is not None:
+                plays[index[card.name]] += 1
+            return card
+        return choose
+
+    player_policy, enemy_policy = MATCHUPS[matchup]
+    player_policy, enemy_policy = counted(POLICIES[player_policy]), counted(POLICIES[enemy_policy])
+    wins = 0
+    for game in range(games):
+        # Одинаковые зёрна для всех кандидатов: сравниваются карты, а не удача раздачи
+        match = Match(cards, random.Random(seed + game))
+        if match.play(player_policy, enemy_policy) == "player":
+            wins += 1
+    return stats, matchup, wins, plays
+
+
+class Evaluation:
+    """Накопленные результаты симуляций одного кандидата"""
+
+    def __init__(self, games=0, wins=None, plays=None):
+        self.games = games  # партий на каждую пару политик
+        self.wins = wins or [0] * len(MATCHUPS)
+        self.plays = plays or [0] * len(CARDS)
+
+    def to_json(self):
+        return {"games": self.games, "wins": self.wins, "plays": self.plays}
+
+    def score(self, stats):
+        """Оценка дисбаланса (меньше — лучше) и её стандартная ошибка"""
+        n = max(self.games, 1)
+        rates = {m: w / n for m, w in zip(MATCHUPS, self.wins)}
+        gaps = []
+        variance = 0.0
+        for a, b in MATCHUPS:
+            if a < b:
+                # Разница побед одной политики над другой при обмене местами
+                gaps.append(abs(rates[(a, b)] - rates[(b, a)]))
+                variance += (rates[(a, b)] * (1 - rates[(a, b)]) + rates[(b, a)] * (1 - rates[(b, a)])) / n
+        policy_gap = sum(gaps) / len(gaps)
+        error = math.sqrt(variance) / len(gaps)
+
+        # Доминирование: насколько самая популярная карта разыгрывается чаще среднего
+        total = max(sum(self.plays), 1)
+        card_gap = max(self.plays) / total - 1 / len(self.plays)
+
+        changes = sum(abs(a - a0) + abs(c - c0) for (a, c), (a0, c0) in zip(stats, BASELINE))
+        return policy_gap + 0.5 * card_gap + CHANGE_PENALTY * changes, error
+
+
+def mutate(stats, rng, rate):
+    result = []
+    for (attack, cost), card in zip(stats, CARDS):
+        if rng.random() < rate:
+            # Карты без атаки (меч, зелье) работают эффектом — меняем только стоимость
+            if card.attack > 0 and rng.random() < 0.5:
+                attack = min(max(attack + rng.choice((-1, 1)), 1), MAX_ATTACK)
+            else:
+                cost = min(max(cost + rng.choice((-1, 1)), 1), MAX_COST)
+        result.append((attack, cost))
+    return tuple(result)
+
+
+def crossover(a, b, rng):
+    return tuple(rng.choice(pair) for pair in zip(a, b))
+
+
+class Optimizer:
+    """Генетический поиск характеристик карт по результатам параллельных симуляций.
+
+    Кандидаты оцениваются пачками партий; как только оценка кандидата статистически
+    хуже лучшего (разница больше двух стандартных ошибок), его симуляции прекращаются.
+    """
+
+    def __init__(self, pool, batch=50, max_games=400, seed=0, cache_path=DEFAULT_CACHE):
+        self.pool = pool
+        self.batch = batch
+        self.max_games = max_games
+        self.seed = seed
+        self.cache_path = cache_path
+        self.cache = {}
+        self.games_played = 0
+        # Партии пачек засеваются seed + сыгранные партии, поэтому дополнять оценки можно
+        # только кэшем с тем же зерном и теми же правилами
+        self.settings = {"seed": seed, "rules": rules_checksum()}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("settings") != self.settings:
+                print(f"Кэш {cache_path} посчитан с другим зерном или правилами, начинаем заново")
+            else:
+                for entry in data["entries"]:
+                    self.cache[tuple(map(tuple, entry["stats"]))] = Evaluation(**entry["evaluation"])
+
+    def save_cache(self):
+        if not self.cache_path:
+            return
+        data = {"settings": self.settings,
+                "entries": [{"stats": stats, "evaluation": e.to_json()} for stats, e in self.cache.items()]}
+        with open(self.cache_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def score(self, stats):
+        return self.cache[stats].score(stats)
+
+    def evaluate(self, candidates):
+        candidates = list(dict.fromkeys(candidates))
+        for stats in candidates:
+            self.cache.setdefault(stats, Evaluation())
+        active = [s for s in candidates if self.cache[s].games < self.max_games]
+        while active:
+            jobs = [(stats, m, self.batch, self.seed + self.cache[stats].games)
+                    for stats in active for m in range(len(MATCHUPS))]
+            for stats, m, wins, plays in self.pool.imap_unordered(_play_batch, jobs):
+                evaluation = self.cache[stats]
+                evaluation.wins[m] += wins
+                for i, count in enumerate(plays):
+                    evaluation.plays[i] += count
+            for stats in active:
+                self.cache[stats].games += self.batch
+            self.games_played += len(jobs) * self.batch
+
+            scores = {s: self.score(s) for s in candidates}
+            best_score, best_error = min(scores.values())
+            # Продолжаем считать только тех, кто ещё может оказаться лучшим
+            active = [s for s in active if self.cache[s].games < self.max_games
+                      and scores[s][0] - 2 * scores[s][1] <= best_score + 2 * best_error]
+        return sorted(candidates, key=lambda s: self.score(s)[0])
+
+    def run(self, generations=20, population=24, mutation_rate=0.15, elite=4):
+        rng = random.Random(self.seed)
+        current = [BASELINE] + [mutate(BASELINE, rng, mutation_rate) for _ in range(population - 1)]
+        for generation in range(1, generations + 1):
+            start = time.perf_counter()
+            ranked = self.evaluate(current)
+            best = ranked[0]
+            score, error = self.score(best)
+            print(f"Поколение {generation}: лучшая оценка {score:.4f} ± {error:.4f}, "
+                  f"всего партий {self.games_played}, {time.perf_counter() - start:.1f} с")
+
+            parents = ranked[:max(elite, population // 2)]
+            children = ranked[:elite]
+            while len(children) < population:
+                # Турнирный отбор из двух
+                a = min(rng.sample(parents, 2), key=lambda s: self.score(s)[0])
+                b = min(rng.sample(parents, 2), key=lambda s: self.score(s)[0])
+                children.append(mutate(crossover(a, b, rng), rng, mutation_rate))
+            current = children
+        self.save_cache()
+
+    def proposals(self, top=5):
+        """Лучшие полностью оценённые наборы характеристик"""
+        finished = [s for s, e in self.cache.items() if e.games >= self.max_games]
+        return sorted(finished, key=lambda s: self.score(s)[0])[:top]
+
+
+def describe(stats, score, error):
+    lines = [f"оценка {score:.4f} ± {error:.4f}"]
+    for card, (attack, cost), (attack0, cost0) in zip(CARDS, stats, BASELINE):
+        if (attack, cost) != (attack0, cost0):
+            lines.append(f"  {card.name:<24} атк {attack0}→{attack}  стоимость {cost0}→{cost}")
+    if len(lines) == 1:
+        lines.append("  без изменений")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Поиск баланса карт по симуляциям партий ботов")
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--population", type=int, default=24)
+    parser.add_argument("--batch", type=int, default=50, help="партий на пару политик за раунд")
+    parser.add_argument("--max-games", type=int, default=400, help="партий на пару политик для полной оценки")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию — все ядра)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="файл кэша оценок ('' — без кэша)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    with Pool(args.workers) as pool:
+        optimizer = Optimizer(pool, args.batch, args.max_games, args.seed, args.cache)
+        optimizer.run(args.generations, args.population)
+
+    baseline_score = optimizer.score(BASELINE) if BASELINE in optimizer.cache else None
+    if baseline_score is not None:
+        print(f"\nТекущие карты: оценка {baseline_score[0]:.4f} ± {baseline_score[1]:.4f}")
+    result = []
+    for rank, stats in enumerate(optimizer.proposals(args.top), 1):
+        score, error = optimizer.score(stats)
+        print(f"\n#{rank} {describe(stats, score, error)}")
+        result.append({"rank": rank, "score": score, "error": error,
+                       "cards": [{"name": c.name, "attack": a, "cost": cost}
+                                 for c, (a, cost) in zip(CARDS, stats)]})
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\nПредложения записаны в {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
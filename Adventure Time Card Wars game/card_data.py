@@ -0,0 +1,31 @@
+from collections import namedtuple
+
+# Характеристики карт без pygame, чтобы ими могли пользоваться и игра, и инструменты
+CardStats = namedtuple("CardStats", "name attack cost")
+
+CARDS = [
+    CardStats("Деревяшка", 2, 1),
+    CardStats("Пламенная Принцесса", 4,  3),
+    CardStats("Финн", 3, 3),
+    CardStats("Джейк", 5, 5),
+    CardStats("Ледяной Король", 3,  4),
+    CardStats("Принцесса Бубльгум", 2, 3),
+    CardStats("Лич", 6,  6),
+    CardStats("БМО", 1,  2),
+    CardStats("Леди Ливнерог", 3,  4),
+    CardStats("Марселин", 4,  3),
+    CardStats("Волшебный Меч", 0,  2),
+    CardStats("Огненный Шар", 3,  3),
+    CardStats("Зелье Исцеления", 0,  2),
+    CardStats("Хансон Абадир", 4, 3),
+    CardStats("Гантер", 1, 1),
+    CardStats("Граф Лимонохват", 2, 3),
+    CardStats("Король Ооо", 2, 1),
+    CardStats("Терпеливая Святая Пим", 3, 3),
+    CardStats("ГОЛБ", 4, 5),
+    CardStats("Волшебный Чел", 3, 2),
+    CardStats("Мятный лакей", 2, 2),
+]
+
+# Сколько копий каждой карты в колоде
+COPIES = 3
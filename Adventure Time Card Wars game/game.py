@@ -2,19 +2,39 @@ import pygame
 import sys
 import random
 import os
+import argparse
+import importlib
+import threading
+import time
+
+import card_data
+from assets import MB, AssetManager
+from card_data import CARDS, COPIES
+from history import History, TurnState, share_hand
+from hot_reload import CardWatcher
+from policy_table import PolicyTable
+from solver import EndgameSolver
+from telemetry import BRANCH, NO_MOVE, PLAY, REDO, SKIP, UNDO, TelemetryLog
+
+try:
+    from value_bot import ValueModel
+except ImportError:  # без NumPy сложность «Обученный» играет как «Сложный»
+    ValueModel = None
+
+# Модуль импортируется без побочных эффектов: окно, шрифты, картинки и музыка
+# создаются поэтапно в main() и по мере надобности экранов
+STARTUP_BEGIN = time.perf_counter()
+startup_stages = []
 
-pygame.init()
-icon = pygame.image.load("icon.png")
-pygame.display.set_icon(icon)
 # Начальные настройки
 WIDTH, HEIGHT = 1400, 800
 FULLSCREEN = False  # Флаг полноэкранного режима
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Время приключений — Карточные Войны")
+screen = None
+TEXTURE_BUDGET = 24 * MB  # Бюджет памяти под загруженные картинки
 
-FONT = pygame.font.SysFont("arial", 20)
-BIGFONT = pygame.font.SysFont("arial", 40)
-SMALLFONT = pygame.font.SysFont("arial", 16)
+FONT = None
+BIGFONT = None
+SMALLFONT = None
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -23,31 +43,78 @@ GREEN = (50, 180, 50)
 BLUE = (50, 50, 200)
 DARKGRAY = (40, 40, 40)
 
-try:
-    menu_bg = pygame.image.load("images/menu_background.png").convert()
-    game_bg = pygame.image.load("images/game_background.png").convert()
-    pause_bg = pygame.image.load("images/pause_background.png").convert_alpha()
-except Exception:
-    menu_bg = pygame.Surface((WIDTH, HEIGHT))
-    menu_bg.fill(DARKGRAY)
-    game_bg = pygame.Surface((WIDTH, HEIGHT))
-    game_bg.fill((30, 60, 30))
-    pause_bg = pygame.Surface((WIDTH, HEIGHT))
-    pause_bg.fill((0, 0, 0, 180))
-
-# Загрузка музыки
+# Фоны: файл, цвет-заглушка, нужна ли альфа, группа выгрузки
+BACKGROUNDS = {
+    "menu": ("images/menu_background.png", DARKGRAY, False, "menu"),
+    "game": ("images/game_background.png", (30, 60, 30), False, "game"),
+    "pause": ("images/pause_background.png", (0, 0, 0, 180), True, "game"),
+}
+assets = AssetManager(TEXTURE_BUDGET)
+
 music_files = []
 current_music_index = 0
-try:
-    music_folder = "music"
-    if os.path.exists(music_folder):
-        music_files = [f for f in os.listdir(music_folder) if f.endswith(('.mp3', '.ogg', '.wav'))]
-        if music_files:
-            pygame.mixer.music.load(os.path.join(music_folder, music_files[current_music_index]))
-            pygame.mixer.music.set_volume(0.5)
-            pygame.mixer.music.play(-1)
-except Exception as e:
-    print(f"Не удалось загрузить музыку: {e}")
+
+
+def mark_stage(name):
+    startup_stages.append((name, time.perf_counter() - STARTUP_BEGIN))
+
+
+def startup_report():
+    return "Запуск: " + ", ".join(f"{name} {seconds * 1000:.0f} мс" for name, seconds in startup_stages)
+
+
+def init_display():
+    """Первый этап: только видеоподсистема и окно, без микшера и джойстиков"""
+    global screen
+    pygame.display.init()
+    try:
+        pygame.display.set_icon(pygame.image.load("icon.png"))
+    except Exception as e:
+        print(f"Не удалось загрузить иконку: {e}")
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Время приключений — Карточные Войны")
+
+
+def init_fonts():
+    global FONT, BIGFONT, SMALLFONT
+    pygame.font.init()
+    FONT = pygame.font.SysFont("arial", 20)
+    BIGFONT = pygame.font.SysFont("arial", 40)
+    SMALLFONT = pygame.font.SysFont("arial", 16)
+
+
+def load_background(path, fallback_color, alpha=False):
+    try:
+        img = pygame.image.load(path)
+        # Фон рисуется в (0, 0), так что видна только часть размером с экран — остальное не храним
+        img = img.subsurface(img.get_rect().clip(pygame.Rect(0, 0, WIDTH, HEIGHT))).copy()
+        return img.convert_alpha() if alpha else img.convert()
+    except Exception:
+        surf = pygame.Surface((WIDTH, HEIGHT))
+        surf.fill(fallback_color)
+        return surf
+
+
+def background(name):
+    path, fallback_color, alpha, group = BACKGROUNDS[name]
+    return assets.get(("background", name, WIDTH, HEIGHT),
+                      lambda: load_background(path, fallback_color, alpha), group)
+
+
+def init_audio(volume):
+    """Микшер и музыка запускаются уже после первого кадра"""
+    global music_files
+    try:
+        pygame.mixer.init()
+        music_folder = "music"
+        if os.path.exists(music_folder):
+            music_files = [f for f in os.listdir(music_folder) if f.endswith(('.mp3', '.ogg', '.wav'))]
+            if music_files:
+                pygame.mixer.music.load(os.path.join(music_folder, music_files[current_music_index]))
+                pygame.mixer.music.set_volume(volume)
+                pygame.mixer.music.play(-1)
+    except Exception as e:
+        print(f"Не удалось загрузить музыку: {e}")
 
 
 def wrap_text(text, font, max_width):
@@ -135,24 +202,81 @@ class Slider:
 
 
 # === Загрузка изображений карт из папки cards ===
-card_images = {}
+card_image_files = {}  # название карты в нижнем регистре -> файл картинки
 cards_folder = "cards"
-if os.path.exists(cards_folder):
+# Пока игрок в меню, фоновый поток декодирует картинки и сразу уменьшает их до размера карты;
+# полноразмерные изображения не хранятся
+_prefetched_card_images = {}
+_card_preload = None
+
+
+def index_card_images():
+    if not os.path.exists(cards_folder):
+        return
     for filename in os.listdir(cards_folder):
         if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
             name = os.path.splitext(filename)[0].lower()
-            img_path = os.path.join(cards_folder, filename)
-            try:
-                img = pygame.image.load(img_path).convert_alpha()
-                img = pygame.transform.smoothscale(img, (100, 140))  # Размер карты
-                card_images[name] = img
-            except Exception as e:
-                print(f"Ошибка загрузки изображения карты {filename}: {e}")
+            card_image_files[name] = os.path.join(cards_folder, filename)
+
+
+def scale_card_image(img):
+    # smoothscale работает только с 24- и 32-битными поверхностями
+    if img.get_bitsize() not in (24, 32):
+        full = pygame.Surface(img.get_size(), pygame.SRCALPHA, 32)
+        full.blit(img, (0, 0))
+        img = full
+    return pygame.transform.smoothscale(img, (100, 140))  # Размер карты
+
+
+def _prefetch_card_images():
+    for name, img_path in list(card_image_files.items()):
+        try:
+            _prefetched_card_images[name] = scale_card_image(pygame.image.load(img_path))
+        except Exception as e:
+            print(f"Ошибка загрузки изображения карты {img_path}: {e}")
+
+
+def start_card_preload():
+    global _card_preload
+    if _card_preload is None:
+        index_card_images()
+        _card_preload = threading.Thread(target=_prefetch_card_images, daemon=True)
+        _card_preload.start()
+
+
+def wait_card_preload():
+    if _card_preload is None:
+        start_card_preload()
+    _card_preload.join()
+
+
+def load_card_image(name):
+    img = _prefetched_card_images.pop(name, None)
+    if img is None:
+        img = scale_card_image(pygame.image.load(card_image_files[name]))
+    return img.convert_alpha()
+
+
+def forget_card_image(name):
+    """Выгрузить картинку карты, чтобы при следующей отрисовке она загрузилась из файла заново"""
+    assets.discard(("card", name))
+    _prefetched_card_images.pop(name, None)
+
+
+def card_image(name):
+    if name not in card_image_files:
+        return None
+    try:
+        return assets.get(("card", name), lambda: load_card_image(name), "cards")
+    except Exception as e:
+        print(f"Ошибка загрузки изображения карты {card_image_files.pop(name)}: {e}")
+        return None
 
 
 class Card:
     WIDTH = 100
     HEIGHT = 140
+    health = 0  # У карт пока нет здоровья; проверки лечения в ходах врага и игрока 2 на него опираются
 
     def __init__(self, name, attack, cost):
         self.name = name
@@ -162,8 +286,13 @@ class Card:
         self.rect = pygame.Rect(0, 0, self.WIDTH, self.HEIGHT)
         self.selected = False
         self.hovered = False
-        # Загружаем изображение карты, если есть
-        self.image = card_images.get(self.name.lower(), None)
+        # Отрисованные надписи; сбрасываются при изменении характеристик
+        self.text_cache = None
+
+    @property
+    def image(self):
+        # Картинки загружаются позже карт и могут быть вытеснены, поэтому ищем при каждой отрисовке
+        return card_image(self.name.lower())
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEMOTION:
@@ -184,68 +313,58 @@ class Card:
         if self.selected:
             pygame.draw.rect(surface, BLUE, self.rect, 3)
 
-        # Отрисовка названия карты с переносом текста
-        name_font = pygame.font.SysFont("arial", 14, bold=True)
-        max_width = self.WIDTH - 10
-
-        lines = wrap_text(self.name, name_font, max_width)
-        y_offset = 10
-
-        for line in lines:
-            name_surf = name_font.render(line, True, BLACK)
+        name_surfs, cost_surf, atk_surf = self.render_text()
+        for name_surf, y_offset in name_surfs:
             name_rect = name_surf.get_rect(centerx=self.rect.centerx, top=self.rect.y + y_offset - 50)
             surface.blit(name_surf, name_rect)
-            y_offset += name_surf.get_height() + 2
-            if y_offset > 40:
-                break
-
-        stats_font = pygame.font.SysFont("arial", 12)
-        cost_surf = stats_font.render(f"Стоимость: {self.cost}", True, RED)
-        atk_surf = stats_font.render(f"Атк: {self.attack}", True, RED)
-        #hp_surf = stats_font.render(f"Зд: {self.health}", True, GREEN)
 
         surface.blit(cost_surf, (self.rect.x + 5, self.rect.bottom + 12))
         surface.blit(atk_surf, (self.rect.x + 5, self.rect.bottom + 0))
         #surface.blit(hp_surf, (self.rect.x + 5, self.rect.bottom - 20))
 
+    def render_text(self):
+        if self.text_cache is None:
+            # Отрисовка названия карты с переносом текста
+            name_font = pygame.font.SysFont("arial", 14, bold=True)
+            max_width = self.WIDTH - 10
+
+            lines = wrap_text(self.name, name_font, max_width)
+            y_offset = 10
+            name_surfs = []
+
+            for line in lines:
+                name_surf = name_font.render(line, True, BLACK)
+                name_surfs.append((name_surf, y_offset))
+                y_offset += name_surf.get_height() + 2
+                if y_offset > 40:
+                    break
+
+            stats_font = pygame.font.SysFont("arial", 12)
+            cost_surf = stats_font.render(f"Стоимость: {self.cost}", True, RED)
+            atk_surf = stats_font.render(f"Атк: {self.attack}", True, RED)
+            #hp_surf = stats_font.render(f"Зд: {self.health}", True, GREEN)
+            self.text_cache = (name_surfs, cost_surf, atk_surf)
+        return self.text_cache
+
+    def invalidate(self):
+        self.text_cache = None
+
 
 def create_deck():
-    cards = [
-        Card("Деревяшка", 2, 1),
-        Card("Пламенная Принцесса", 4,  3),
-        Card("Финн", 3, 3),
-        Card("Джейк", 5, 5),
-        Card("Ледяной Король", 3,  4),
-        Card("Принцесса Бубльгум", 2, 3),
-        Card("Лич", 6,  6),
-        Card("БМО", 1,  2),
-        Card("Леди Ливнерог", 3,  4),
-        Card("Марселин", 4,  3),
-        Card("Волшебный Меч", 0,  2),
-        Card("Огненный Шар", 3,  3),
-        Card("Зелье Исцеления", 0,  2),
-        Card("Хансон Абадир", 4, 3),
-        Card("Гантер", 1, 1),
-        Card("Граф Лимонохват", 2, 3),
-        Card("Король Ооо", 2, 1),
-        Card("Терпеливая Святая Пим", 3, 3),
-        Card("ГОЛБ", 4, 5),
-        Card("Волшебный Чел", 3, 2),
-        Card("Мятный лакей", 2, 2),
-
-    ]
-    deck = cards * 3
+    cards = [Card(*stats) for stats in CARDS]
+    deck = cards * COPIES
     random.shuffle(deck)
     return deck
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, telemetry=None):
         self.clock = pygame.time.Clock()
         self.running = True
         self.state = "menu"  # menu, mode_select, game, pause, settings_menu, settings_pause
         self.full_deck = create_deck()
         self.deck = self.full_deck.copy()
+        self.deck_order = tuple(self.deck)
         self.player_hand = []
         self.enemy_hand = []
         self.player2_hand = []
@@ -269,10 +388,25 @@ class Game:
         self.turn_number = 1
         self.game_mode = None  # 'bot' или '2players'
         self.fullscreen = False  # Флаг полноэкранного режима
+        self.show_texture_stats = False  # F3 — расход памяти на картинки и статистика перебора
+        self.watcher = None  # CardWatcher в режиме --watch
 
         # Флаг эффекта Волшебного Меча
         self.sword_buff_active = False
 
+        # История ходов для отмены и веток в режиме двух игроков
+        self.history = None
+
+        # Перебор эндшпиля для сложности «Сложный+»; таблица транспозиций живёт между ходами
+        self.endgame_solver = EndgameSolver(self.full_deck)
+        # Предрасчитанная политика для сложности «Сильный» (python policy_table.py)
+        self.policy_table = PolicyTable.open()
+        # Обученная самоигрой оценочная функция для сложности «Обученный» (python value_bot.py)
+        self.value_model = ValueModel.load() if ValueModel is not None else None
+        # Журнал действий для аналитики (python analytics.py); по умолчанию выключен,
+        # настоящий журнал создаёт main(), чтобы инструменты и тесты не писали файлы
+        self.telemetry = telemetry if telemetry is not None else TelemetryLog(folder=None)
+
         self.volume_slider = Slider((WIDTH // 2 - 150, 550, 300, 20), 0.0, 1.0, self.volume, self.set_volume)
 
         self.create_menu_buttons()
@@ -322,6 +456,10 @@ class Game:
             WIDTH, HEIGHT = 1400, 800
             screen = pygame.display.set_mode((WIDTH, HEIGHT))
 
+        # Фоны хранятся под размер экрана — старые больше не понадобятся
+        assets.release_group("menu")
+        assets.release_group("game")
+
         # Обновляем позиции элементов интерфейса
         self.create_menu_buttons()
         self.create_mode_buttons()
@@ -335,7 +473,8 @@ class Game:
 
     def set_volume(self, val):
         self.volume = val
-        pygame.mixer.music.set_volume(val)
+        if pygame.mixer.get_init():
+            pygame.mixer.music.set_volume(val)
 
     def create_menu_buttons(self):
         self.buttons = []
@@ -381,6 +520,12 @@ class Game:
             self.bot_difficulty = "Лёгкий"
         elif self.bot_difficulty == "Лёгкий":
             self.bot_difficulty = "Сложный"
+        elif self.bot_difficulty == "Сложный":
+            self.bot_difficulty = "Сложный+"
+        elif self.bot_difficulty == "Сложный+":
+            self.bot_difficulty = "Сильный"
+        elif self.bot_difficulty == "Сильный":
+            self.bot_difficulty = "Обученный"
         else:
             self.bot_difficulty = "Средний"
 
@@ -402,9 +547,13 @@ class Game:
         self.start_game_common()
 
     def start_game_common(self):
+        wait_card_preload()
+        # Во время партии арт меню не нужен
+        assets.release_group("menu")
         self.state = "game"
         self.deck = self.full_deck.copy()
         random.shuffle(self.deck)
+        self.deck_order = tuple(self.deck)
         self.player_hand = [self.draw_card() for _ in range(5)]
         self.enemy_hand = [self.draw_card() for _ in range(5)]
         self.player2_hand = [self.draw_card() for _ in range(5)]
@@ -418,10 +567,15 @@ class Game:
         self.selected_card = None
         self.message = ""
         self.sword_buff_active = False  # сброс эффекта меча
+        self.telemetry.start_match(self.game_mode, self.bot_difficulty,
+                                   {"player": self.player_hand, "enemy": self.enemy_hand,
+                                    "player2": self.player2_hand},
+                                   self.player_health, self.player_mana)
         if self.game_mode == 'bot':
             self.turn = "player"
         else:
             self.turn = "player"
+        self.history = History(self.snapshot())
 
     def goto_settings_menu(self):
         self.state = "settings_menu"
@@ -445,12 +599,15 @@ class Game:
 
     def exit_to_menu(self):
         self.state = "menu"
+        assets.release_group("game")
+        assets.release_group("cards")
         self.create_menu_buttons()
 
     def draw_card(self):
         if not self.deck:
             self.deck = self.full_deck.copy()
             random.shuffle(self.deck)
+            self.deck_order = tuple(self.deck)
             self.message = "Колода перемешана заново!"
         return self.deck.pop()
 
@@ -476,6 +633,7 @@ class Game:
             self.message = f"Вы использовали {card.name} и восстановили {heal_amount} здоровья."
             self.player_hand.pop(card_index)
             self.player_hand.append(self.draw_card())
+            self.log_action(PLAY, "player", card, card_index, self.player_hand[-1])
             self.end_turn()
             return
 
@@ -485,6 +643,7 @@ class Game:
             self.message = f"Вы использовали {card.name}. Следующая карта получит +1 к урону."
             self.player_hand.pop(card_index)
             self.player_hand.append(self.draw_card())
+            self.log_action(PLAY, "player", card, card_index, self.player_hand[-1])
             self.end_turn()
             return
 
@@ -507,6 +666,7 @@ class Game:
         self.message = f"Вы сыграли карту {card.name} и нанесли {damage} урона."
         self.player_hand.pop(card_index)
         self.player_hand.append(self.draw_card())
+        self.log_action(PLAY, "player", card, card_index, self.player_hand[-1])
         self.end_turn()
 
     def player2_play_card(self, card_index):
@@ -532,36 +692,196 @@ class Game:
         self.message = f"Игрок 2 сыграл карту {card.name} и нанёс {damage} урона."
         self.player2_hand.pop(card_index)
         self.player2_hand.append(self.draw_card())
+        self.log_action(PLAY, "player2", card, card_index, self.player2_hand[-1])
         self.end_turn()
 
     def enemy_turn(self):
         playable_cards = [c for c in self.enemy_hand if c.cost <= self.enemy_mana]
         if not playable_cards:
-            self.message = "Враг пропускает ход."
-            self.enemy_mana = min(self.enemy_mana + self.turn_number, 10)
-            self.turn = "player"
-            self.turn_number += 1
+            self.enemy_skip_turn()
             return
 
         if self.bot_difficulty == "Лёгкий":
             card = min(playable_cards, key=lambda c: c.cost)
         elif self.bot_difficulty == "Средний":
             card = max(playable_cards, key=lambda c: c.attack)
+        elif self.bot_difficulty == "Сильный" and self.policy_table is not None:
+            card = self.policy_table.choose_card(playable_cards, self.enemy_mana, self.player_health,
+                                                 self.enemy_health, self.turn_number, self.sword_buff_active)
+        elif self.bot_difficulty == "Обученный" and self.value_model is not None:
+            card = self.value_model.choose_card(playable_cards, self.enemy_hand, self.player_health,
+                                                self.enemy_health, self.player_mana, self.enemy_mana,
+                                                self.turn_number, self.sword_buff_active)
         else:
-            card = max(playable_cards, key=lambda c: (c.attack / max(c.cost, 1)))
+            card = None
+            if self.bot_difficulty == "Сложный+" and self.endgame_solver.is_endgame(self.player_health):
+                # Перебор отвечает только доказанным выигрышем, иначе играем как «Сложный»
+                card = self.endgame_solver.choose_card(self.endgame_position(), playable_cards)
+            if card is None:
+                card = max(playable_cards, key=lambda c: (c.attack / max(c.cost, 1)))
+        self.enemy_play_card(card)
+
+    def enemy_skip_turn(self):
+        self.message = "Враг пропускает ход."
+        self.enemy_mana = min(self.enemy_mana + self.turn_number, 10)
+        self.log_action(NO_MOVE, "enemy")
+        self.turn = "player"
+        self.turn_number += 1
 
+    def enemy_play_card(self, card):
         self.enemy_mana -= card.cost
         damage = max(card.attack - 1, 0)
         self.player_health -= damage
         if card.attack == 0 and card.health > 0:
             self.enemy_health += card.health
         self.message = f"Враг сыграл карту {card.name} и нанес {damage} урона."
+        slot = self.enemy_hand.index(card)
         self.enemy_hand.remove(card)
         self.enemy_hand.append(self.draw_card())
+        self.log_action(PLAY, "enemy", card, slot, self.enemy_hand[-1])
         self.turn = "player"
         self.player_mana = min(self.player_mana + self.turn_number, 10)
         self.turn_number += 1
 
+    def endgame_position(self):
+        """Текущая позиция для решателя эндшпиля (ход врага)"""
+        # Руку игрока враг не видит: для него она — часть невидимых карт вместе с колодой
+        return self.endgame_solver.position(
+            self.player_health, self.enemy_health, self.player_mana, self.enemy_mana,
+            self.turn_number, self.sword_buff_active, False,
+            self.enemy_hand, self.player_hand + self.deck)
+
+    def snapshot(self):
+        """Неизменяемый снимок партии; неизменённые руки и колода общие с прошлым снимком"""
+        previous = self.history.state if self.history is not None else None
+        return TurnState(
+            share_hand(previous.player_hand if previous else None, self.player_hand),
+            share_hand(previous.enemy_hand if previous else None, self.enemy_hand),
+            share_hand(previous.player2_hand if previous else None, self.player2_hand),
+            self.deck_order, len(self.deck),
+            self.player_health, self.enemy_health, self.player2_health,
+            self.player_mana, self.enemy_mana, self.player2_mana,
+            self.turn, self.turn_number, self.sword_buff_active)
+
+    def restore(self, state):
+        self.player_hand = list(state.player_hand)
+        self.enemy_hand = list(state.enemy_hand)
+        self.player2_hand = list(state.player2_hand)
+        self.deck_order = state.deck_order
+        self.deck = list(state.deck_order[:state.deck_size])
+        self.player_health = state.player_health
+        self.enemy_health = state.enemy_health
+        self.player2_health = state.player2_health
+        self.player_mana = state.player_mana
+        self.enemy_mana = state.enemy_mana
+        self.player2_mana = state.player2_mana
+        self.turn = state.turn
+        self.turn_number = state.turn_number
+        self.sword_buff_active = state.sword_buff_active
+
+    def undo_turn(self):
+        state = self.history.undo()
+        if state is None:
+            self.message = "Отменять нечего."
+            return
+        self.restore(state)
+        self.log_history(UNDO)
+        self.message = "Ход отменён. Ctrl+Y — вернуть, [ и ] — другие ветки."
+
+    def redo_turn(self):
+        state = self.history.redo()
+        if state is None:
+            self.message = "Повторять нечего."
+            return
+        self.restore(state)
+        self.log_history(REDO)
+        self.message = "Ход возвращён."
+
+    def switch_branch(self, step):
+        state = self.history.switch_branch(step)
+        if state is None:
+            self.message = "Других вариантов этого хода нет."
+            return
+        self.restore(state)
+        self.log_history(BRANCH, step)
+        index, count = self.history.branch_position()
+        self.message = f"Вариант хода {index} из {count}."
+
+    def hot_reload(self):
+        """Подхватить изменённые картинки из cards/ и характеристики из card_data.py"""
+        changes = self.watcher.poll()
+        if changes is None:
+            return
+        start = time.perf_counter()
+        changed, removed, data_changed = changes
+        for filename in changed:
+            name = os.path.splitext(filename)[0].lower()
+            card_image_files[name] = os.path.join(cards_folder, filename)
+            forget_card_image(name)
+        for filename in removed:
+            name = os.path.splitext(filename)[0].lower()
+            card_image_files.pop(name, None)
+            forget_card_image(name)
+        updated = self.reload_card_stats() if data_changed else []
+        print(f"Перезагрузка: картинок {len(changed) + len(removed)}, карт с новыми характеристиками "
+              f"{len(updated)}, {(time.perf_counter() - start) * 1000:.0f} мс")
+
+    def reload_card_stats(self):
+        try:
+            importlib.reload(card_data)
+        except Exception as e:
+            print(f"Не удалось перечитать card_data.py: {e}")
+            return []
+        stats = {c.name: c for c in card_data.CARDS}
+        # Колода собрана при запуске: новые и удалённые карты на лету не подхватываются
+        deck_names = {c.name for c in self.full_deck}
+        added = [name for name in stats if name not in deck_names]
+        missing = sorted(deck_names - stats.keys())
+        if added:
+            print(f"Новые карты появятся в колоде только после перезапуска: {', '.join(added)}")
+        if missing:
+            print(f"Удалённые карты останутся в колоде до перезапуска: {', '.join(missing)}")
+        updated = []
+        # Колода состоит из нескольких ссылок на одни и те же карты
+        for card in {id(c): c for c in self.full_deck}.values():
+            new_stats = stats.get(card.name)
+            if new_stats and (new_stats.attack, new_stats.cost) != (card.attack, card.cost):
+                card.attack = new_stats.attack
+                card.cost = new_stats.cost
+                card.invalidate()
+                updated.append(card)
+        if updated:
+            # Перебор и таблица политики посчитаны для старых характеристик
+            self.endgame_solver = EndgameSolver(self.full_deck)
+            if self.policy_table is not None:
+                self.policy_table.close()
+            self.policy_table = PolicyTable.open(cards=card_data.CARDS)
+            self.value_model = ValueModel.load(cards=card_data.CARDS) if ValueModel is not None else None
+        return updated
+
+    def log_action(self, event, actor, card=None, slot=-1, drawn=None):
+        """Запись делается после действия ходящего, но до передачи хода:
+        mana — мана ходящего после его действия, номер хода ещё не увеличен"""
+        opponent_health = self.enemy_health if self.game_mode == 'bot' else self.player2_health
+        mana = {"player": self.player_mana, "enemy": self.enemy_mana, "player2": self.player2_mana}[actor]
+        self.telemetry.record(event, actor, self.turn_number, self.player_health, opponent_health, mana,
+                              card, slot, drawn)
+
+    def log_history(self, event, step=0):
+        """Переходы по истории тоже пишутся в журнал, чтобы аналитика и воспроизведение
+        знали, какие ходы отменены"""
+        opponent_health = self.enemy_health if self.game_mode == 'bot' else self.player2_health
+        mana = {"player": self.player_mana, "enemy": self.enemy_mana, "player2": self.player2_mana}[self.turn]
+        self.telemetry.record_history(event, self.turn, self.turn_number, self.player_health, opponent_health,
+                                      mana, self.history.depth, step)
+
+    def finish_match(self, winner):
+        # draw_game проверяет конец партии каждый кадр — записываем его один раз
+        if self.turn is not None:
+            opponent_health = self.enemy_health if self.game_mode == 'bot' else self.player2_health
+            self.telemetry.end_match(winner, self.turn_number, self.player_health, opponent_health)
+        self.turn = None
+
     def end_turn(self):
         if self.game_mode == 'bot':
             if self.turn == "player":
@@ -580,6 +900,7 @@ class Game:
                 self.turn = "player"
                 self.player_mana = min(self.player_mana + self.turn_number, 10)
                 self.turn_number += 1
+            self.history.push(self.snapshot())
 
     def skip_turn(self):
         if self.turn is None:
@@ -587,29 +908,36 @@ class Game:
         if self.game_mode == 'bot':
             if self.turn == "player":
                 self.message = "Вы пропускаете ход."
+                self.log_action(SKIP, "player")
                 self.turn = "enemy"
                 self.enemy_mana = min(self.enemy_mana + self.turn_number, 10)
                 pygame.time.set_timer(pygame.USEREVENT + 1, 1000)
             elif self.turn == "enemy":
                 self.message = "Враг пропускает ход."
+                self.log_action(SKIP, "enemy")
                 self.turn = "player"
                 self.player_mana = min(self.player_mana + self.turn_number, 10)
                 self.turn_number += 1
         else:
             if self.turn == "player":
                 self.message = "Игрок 1 пропускает ход."
+                self.log_action(SKIP, "player")
                 self.turn = "player2"
                 self.player2_mana = min(self.player2_mana + self.turn_number, 10)
             elif self.turn == "player2":
                 self.message = "Игрок 2 пропускает ход."
+                self.log_action(SKIP, "player2")
                 self.turn = "player"
                 self.player_mana = min(self.player_mana + self.turn_number, 10)
                 self.turn_number += 1
+            self.history.push(self.snapshot())
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.show_texture_stats = not self.show_texture_stats
 
             if self.state == "menu":
                 for btn in self.buttons:
@@ -625,6 +953,16 @@ class Game:
                         self.running = False
                     elif event.key == pygame.K_F11:  # Горячая клавиша F11 для переключения полноэкранного режима
                         self.toggle_fullscreen()
+                    elif self.game_mode == '2players':
+                        # Отмена, повтор и ветки «а что если» — только в игре вдвоём
+                        if event.mod & pygame.KMOD_CTRL and event.key == pygame.K_z:
+                            self.undo_turn()
+                        elif event.mod & pygame.KMOD_CTRL and event.key == pygame.K_y:
+                            self.redo_turn()
+                        elif event.key == pygame.K_LEFTBRACKET:
+                            self.switch_branch(-1)
+                        elif event.key == pygame.K_RIGHTBRACKET:
+                            self.switch_branch(1)
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     mx, my = event.pos
 
@@ -700,21 +1038,21 @@ class Game:
                 self.next_music_button.handle_event(event)
 
     def draw_menu(self):
-        screen.blit(menu_bg, (0, 0))
+        screen.blit(background("menu"), (0, 0))
         title = BIGFONT.render("Время приключений — Карточные Войны", True, WHITE)
         screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 180))
         for btn in self.buttons:
             btn.draw(screen)
 
     def draw_mode_select(self):
-        screen.blit(menu_bg, (0, 0))
+        screen.blit(background("menu"), (0, 0))
         title = BIGFONT.render("Выберите режим игры", True, WHITE)
         screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 180))
         for btn in self.mode_buttons:
             btn.draw(screen)
 
     def draw_game(self):
-        screen.blit(game_bg, (0, 0))
+        screen.blit(background("game"), (0, 0))
 
         start_x = 100
         gap = 30
@@ -777,27 +1115,27 @@ class Game:
                 self.message = "Вы проиграли! Нажмите на паузу чтобы выйти."
                 lose_text = BIGFONT.render("Поражение!", True, RED)
                 screen.blit(lose_text, (WIDTH // 2 - lose_text.get_width() // 2, HEIGHT // 2))
-                self.turn = None
+                self.finish_match("enemy")
             if self.enemy_health <= 0:
                 self.message = "Вы выиграли! Нажмите на паузу чтобы выйти."
                 win_text = BIGFONT.render("Победа!", True, GREEN)
                 screen.blit(win_text, (WIDTH // 2 - win_text.get_width() // 2, HEIGHT // 2))
-                self.turn = None
+                self.finish_match("player")
         else:
             if self.player_health <= 0:
                 self.message = "Игрок 1 проиграл! Нажмите на паузу чтобы выйти."
                 lose_text = BIGFONT.render("Поражение Игрока 1!", True, RED)
                 screen.blit(lose_text, (WIDTH // 2 - lose_text.get_width() // 2, HEIGHT // 2))
-                self.turn = None
+                self.finish_match("player2")
             if self.player2_health <= 0:
                 self.message = "Игрок 2 проиграл! Нажмите на паузу чтобы выйти."
                 lose_text = BIGFONT.render("Поражение Игрока 2!", True, RED)
                 screen.blit(lose_text, (WIDTH // 2 - lose_text.get_width() // 2, HEIGHT // 2))
-                self.turn = None
+                self.finish_match("player")
 
     def draw_pause(self):
-        screen.blit(game_bg, (0, 0))
-        screen.blit(pause_bg, (0, 0))
+        screen.blit(background("game"), (0, 0))
+        screen.blit(background("pause"), (0, 0))
 
         # Заголовок
         title = BIGFONT.render("Пауза", True, WHITE)
@@ -808,7 +1146,7 @@ class Game:
             btn.draw(screen)
 
     def draw_settings_menu(self):
-        screen.blit(menu_bg, (0, 0))
+        screen.blit(background("menu"), (0, 0))
         title = BIGFONT.render("Настройки (Меню)", True, WHITE)
         screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 100))
 
@@ -835,7 +1173,7 @@ class Game:
             btn.draw(screen)
 
     def draw_settings_pause(self):
-        screen.blit(pause_bg, (0, 0))
+        screen.blit(background("pause"), (0, 0))
         title = BIGFONT.render("Настройки (Пауза)", True, WHITE)
         screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 100))
 
@@ -862,8 +1200,11 @@ class Game:
             btn.draw(screen)
 
     def run(self):
+        first_frame = True
         while self.running:
             self.handle_events()
+            if self.watcher is not None:
+                self.hot_reload()
 
             if self.state == "menu":
                 self.draw_menu()
@@ -878,12 +1219,45 @@ class Game:
             elif self.state == "settings_pause":
                 self.draw_settings_pause()
 
+            if self.show_texture_stats:
+                stats_text = SMALLFONT.render(assets.report(), True, WHITE)
+                screen.blit(stats_text, (10, HEIGHT - 25))
+                if self.bot_difficulty == "Сложный+" and self.endgame_solver.depth_reached:
+                    solver_text = SMALLFONT.render(self.endgame_solver.report(), True, WHITE)
+                    screen.blit(solver_text, (10, HEIGHT - 45))
+
             pygame.display.flip()
+            if first_frame:
+                first_frame = False
+                mark_stage("меню")
+                init_audio(self.volume)
+                mark_stage("музыка")
+                print(startup_report())
             self.clock.tick(60)
 
 
-if __name__ == "__main__":
-    game = Game()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Время приключений — Карточные Войны")
+    parser.add_argument("--watch", action="store_true",
+                        help="перезагружать изменённые картинки карт и card_data.py на лету")
+    args = parser.parse_args(argv)
+
+    init_display()
+    # Минимальный первый кадр, пока грузится остальное
+    screen.fill(DARKGRAY)
+    pygame.display.flip()
+    mark_stage("первый кадр")
+
+    start_card_preload()
+    init_fonts()
+    game = Game(telemetry=TelemetryLog())
+    if args.watch:
+        game.watcher = CardWatcher(cards_folder, card_data.__file__)
     game.run()
+    game.telemetry.close()
     pygame.quit()
     sys.exit()
+
+
+if __name__ == "__main__":
+    main()
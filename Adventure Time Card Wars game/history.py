@@ -0,0 +1,86 @@
+from collections import namedtuple
+
+# Неизменяемый снимок партии. Колода хранится как перемешанный порядок плюс число оставшихся карт:
+# карты берутся только с конца, поэтому все снимки до перемешивания делят один кортеж
+TurnState = namedtuple("TurnState", [
+    "player_hand", "enemy_hand", "player2_hand", "deck_order", "deck_size",
+    "player_health", "enemy_health", "player2_health",
+    "player_mana", "enemy_mana", "player2_mana",
+    "turn", "turn_number", "sword_buff_active",
+])
+
+
+def share_hand(previous, hand):
+    """Кортеж руки; если рука не менялась, возвращается кортеж из прошлого снимка"""
+    if previous is not None and len(previous) == len(hand) and all(a is b for a, b in zip(previous, hand)):
+        return previous
+    return tuple(hand)
+
+
+class HistoryNode:
+    __slots__ = ("state", "parent", "children", "branch", "depth")
+
+    def __init__(self, state, parent):
+        self.state = state
+        self.parent = parent
+        self.children = []
+        self.branch = 0  # какой из детей возвращает redo
+        self.depth = parent.depth + 1 if parent is not None else 0
+
+
+class History:
+    """Дерево ходов партии: отмена, повтор и переключение между ветками «а что если» за O(1).
+
+    Новый ход после отмены не стирает старое продолжение, а начинает рядом новую ветку.
+    """
+
+    def __init__(self, state):
+        self.root = HistoryNode(state, None)
+        self.current = self.root
+
+    @property
+    def state(self):
+        return self.current.state
+
+    @property
+    def depth(self):
+        return self.current.depth
+
+    def push(self, state):
+        # Повтор того же хода после отмены ведёт в уже существующую ветку, а не создаёт её копию
+        for i, child in enumerate(self.current.children):
+            if child.state == state:
+                self.current.branch = i
+                self.current = child
+                return
+        node = HistoryNode(state, self.current)
+        self.current.children.append(node)
+        self.current.branch = len(self.current.children) - 1
+        self.current = node
+
+    def undo(self):
+        if self.current.parent is None:
+            return None
+        self.current = self.current.parent
+        return self.current.state
+
+    def redo(self):
+        if not self.current.children:
+            return None
+        self.current = self.current.children[self.current.branch]
+        return self.current.state
+
+    def switch_branch(self, step):
+        """Перейти к соседней ветке того же хода"""
+        parent = self.current.parent
+        if parent is None or len(parent.children) < 2:
+            return None
+        parent.branch = (parent.children.index(self.current) + step) % len(parent.children)
+        self.current = parent.children[parent.branch]
+        return self.current.state
+
+    def branch_position(self):
+        parent = self.current.parent
+        if parent is None:
+            return 1, 1
+        return parent.children.index(self.current) + 1, len(parent.children)
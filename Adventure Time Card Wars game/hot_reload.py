@@ -0,0 +1,55 @@
+import os
+import time
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class CardWatcher:
+    """Следит за картинками в папке карт и за файлом характеристик по времени изменения.
+
+    Опрос дешёвый (один проход по папке), поэтому выполняется прямо из игрового цикла
+    не чаще раза в interval секунд.
+    """
+
+    def __init__(self, cards_folder, data_path, interval=0.25):
+        self.cards_folder = cards_folder
+        self.data_path = data_path
+        self.interval = interval
+        self.next_poll = time.perf_counter() + interval
+        self.images = self._scan()
+        self.data_mtime = _mtime(data_path)
+
+    def _scan(self):
+        images = {}
+        if os.path.exists(self.cards_folder):
+            for entry in os.scandir(self.cards_folder):
+                if entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    images[entry.name] = entry.stat().st_mtime_ns
+        return images
+
+    def poll(self):
+        """None, если ничего не изменилось; иначе (изменённые/новые файлы, удалённые файлы, изменились ли характеристики)"""
+        now = time.perf_counter()
+        if now < self.next_poll:
+            return None
+        self.next_poll = now + self.interval
+
+        images = self._scan()
+        changed = [name for name, mtime in images.items() if self.images.get(name) != mtime]
+        removed = [name for name in self.images if name not in images]
+        self.images = images
+
+        data_mtime = _mtime(self.data_path)
+        data_changed = data_mtime != self.data_mtime
+        self.data_mtime = data_mtime
+
+        if not changed and not removed and not data_changed:
+            return None
+        return changed, removed, data_changed
@@ -0,0 +1,168 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+from multiprocessing import Pool
+
+from card_data import CARDS
+from simulation import MAX_HEALTH, MAX_MANA, Match, POLICIES, hard_policy
+
+MAGIC = b"ATCWPOL1"
+# magic, типов карт, уровней маны, корзин здоровья, корзин хода, состояний меча, контрольная сумма карт
+HEADER = struct.Struct("<8sHHHHHI")
+HEALTH_BUCKET = 4
+HEALTH_BUCKETS = MAX_HEALTH // HEALTH_BUCKET
+TURN_BUCKETS = (1, 2, 4, 7)  # первые ходы корзин; прирост маны зависит от номера хода
+MANA_LEVELS = MAX_MANA + 1
+DEFAULT_PATH = "bot_policy.bin"
+
+
+def cards_checksum(cards=CARDS):
+    """Таблица годится только для тех характеристик карт, по которым её считали"""
+    return zlib.crc32(repr([tuple(c) for c in cards]).encode("utf-8"))
+
+
+def health_bucket(health):
+    return (min(max(health, 1), MAX_HEALTH) - 1) // HEALTH_BUCKET
+
+
+def turn_bucket(turn_number):
+    bucket = 0
+    for i, first_turn in enumerate(TURN_BUCKETS):
+        if turn_number >= first_turn:
+            bucket = i
+    return bucket
+
+
+def context_index(mana, player_health, enemy_health, turn_number, sword_buff):
+    index = min(max(mana, 0), MAX_MANA)
+    index = index * HEALTH_BUCKETS + health_bucket(player_health)
+    index = index * HEALTH_BUCKETS + health_bucket(enemy_health)
+    index = index * len(TURN_BUCKETS) + turn_bucket(turn_number)
+    return index * 2 + (1 if sword_buff else 0)
+
+
+CONTEXTS = MANA_LEVELS * HEALTH_BUCKETS * HEALTH_BUCKETS * len(TURN_BUCKETS) * 2
+
+
+class PolicyTable:
+    """Предрасчитанная политика сильного бота, открытая через mmap.
+
+    Для каждого контекста (мана врага, корзины здоровья, корзина хода, меч)
+    хранится байт на тип карты — оценка шанса победы врага после её розыгрыша.
+    Выбор хода — несколько чтений байтов из отображённого файла, без разбора при загрузке.
+    """
+
+    def __init__(self, data, cards=CARDS):
+        self.data = data
+        self.n_types = len(cards)
+        self.index = {c.name: i for i, c in enumerate(cards)}
+
+    @classmethod
+    def open(cls, path=DEFAULT_PATH, cards=CARDS):
+        """Открыть таблицу; None, если файла нет или он посчитан для других карт"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            print(f"Не удалось открыть таблицу политики {path}: {e}")
+            return None
+        expected = (MAGIC, len(cards), MANA_LEVELS, HEALTH_BUCKETS, len(TURN_BUCKETS), 2, cards_checksum(cards))
+        if len(data) != HEADER.size + CONTEXTS * len(cards) or HEADER.unpack_from(data) != expected:
+            print(f"Таблица политики {path} устарела, пересчитайте её: python policy_table.py")
+            data.close()
+            return None
+        return cls(data, cards)
+
+    def score(self, card_name, mana, player_health, enemy_health, turn_number, sword_buff):
+        offset = context_index(mana, player_health, enemy_health, turn_number, sword_buff) * self.n_types
+        return self.data[HEADER.size + offset + self.index[card_name]]
+
+    def choose_card(self, playable_cards, mana, player_health, enemy_health, turn_number, sword_buff):
+        row = HEADER.size + context_index(mana, player_health, enemy_health, turn_number, sword_buff) * self.n_types
+        return max(playable_cards, key=lambda c: self.data[row + self.index[c.name]])
+
+    def close(self):
+        self.data.close()
+
+
+# === Предрасчёт ===
+
+def _context_scores(args):
+    """Оценить все карты одного контекста розыгрышами до конца партии"""
+    index, rollouts, seed = args
+    sword_buff = index % 2 == 1
+    rest = index // 2
+    tb = rest % len(TURN_BUCKETS)
+    rest //= len(TURN_BUCKETS)
+    eh = rest % HEALTH_BUCKETS
+    rest //= HEALTH_BUCKETS
+    ph = rest % HEALTH_BUCKETS
+    mana = rest // HEALTH_BUCKETS
+
+    first_turn = TURN_BUCKETS[tb]
+    last_turn = TURN_BUCKETS[tb + 1] - 1 if tb + 1 < len(TURN_BUCKETS) else first_turn + 5
+    player_policies = list(POLICIES.values())
+    wins = [0] * len(CARDS)
+
+    for i in range(rollouts):
+        scenario = (seed * CONTEXTS + index) * rollouts + i
+        # Одни и те же сценарии для всех карт: сравниваются карты, а не удача добора
+        for t, stats in enumerate(CARDS):
+            if stats.cost > mana:
+                continue
+            rng = random.Random(scenario)
+            match = Match(CARDS, rng)
+            match.player_health = rng.randint(ph * HEALTH_BUCKET + 1, (ph + 1) * HEALTH_BUCKET)
+            match.enemy_health = rng.randint(eh * HEALTH_BUCKET + 1, (eh + 1) * HEALTH_BUCKET)
+            match.turn_number = rng.randint(first_turn, last_turn)
+            match.player_mana = rng.randint(0, MAX_MANA)
+            match.enemy_mana = mana
+            match.sword_buff_active = sword_buff
+            match.turn = "enemy"
+            player_policy = rng.choice(player_policies)
+            match.enemy_hand[0] = stats
+            match.enemy_play_card(stats)
+            if match.play(player_policy, hard_policy) == "enemy":
+                wins[t] += 1
+
+    return index, bytes(round(255 * w / rollouts) for w in wins)
+
+
+def build(path=DEFAULT_PATH, rollouts=64, workers=None, seed=0):
+    table = bytearray(CONTEXTS * len(CARDS))
+    start = time.perf_counter()
+    jobs = [(index, rollouts, seed) for index in range(CONTEXTS)]
+    with Pool(workers) as pool:
+        for done, (index, scores) in enumerate(pool.imap_unordered(_context_scores, jobs, chunksize=8), 1):
+            table[index * len(CARDS):(index + 1) * len(CARDS)] = scores
+            if done % 200 == 0 or done == CONTEXTS:
+                print(f"Контекстов: {done}/{CONTEXTS}, {time.perf_counter() - start:.0f} с")
+
+    header = HEADER.pack(MAGIC, len(CARDS), MANA_LEVELS, HEALTH_BUCKETS, len(TURN_BUCKETS), 2, cards_checksum())
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(table)
+    os.replace(tmp_path, path)
+    print(f"Таблица политики записана в {path}: {len(header) + len(table)} байт")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Предрасчёт политики сильного бота")
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    parser.add_argument("--rollouts", type=int, default=64, help="розыгрышей на карту в каждом контексте")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию — все ядра)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    build(args.output, args.rollouts, args.workers, args.seed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import os
+
+# Рендер без окна и без звука; задаётся до импорта pygame
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import multiprocessing
+import sys
+import time
+from collections import OrderedDict
+
+import pygame
+
+import game
+from telemetry import (ACTORS, BRANCH, DEAL, DIFFICULTIES, FILE_MAGIC, MATCH_START, MODES, NO_MOVE, PLAY, RECORD,
+                       REDO, SKIP, UNDO)
+
+DEFAULT_OUTPUT = "frames"
+
+
+class ReplayMismatch(Exception):
+    """Воспроизведённое действие не совпало с записью в журнале"""
+
+
+def read_matches(paths):
+    """События журналов телеметрии, сгруппированные по партиям в порядке записи"""
+    matches = OrderedDict()
+    for path in paths:
+        with open(path, "rb") as f:
+            if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                print(f"Пропущен файл не того формата: {path}")
+                continue
+            data = f.read()
+        usable = len(data) - len(data) % RECORD.size
+        for record in RECORD.iter_unpack(data[:usable]):
+            matches.setdefault(record[0], []).append(record)
+    return matches
+
+
+def _encode_worker(frames, results):
+    """Процесс-кодировщик: получает сырые кадры из очереди и пишет PNG"""
+    busy = 0.0
+    count = 0
+    while True:
+        item = frames.get()
+        if item is None:
+            break
+        start = time.perf_counter()
+        data, size, paths = item
+        surface = pygame.image.frombuffer(data, size, "RGB")
+        pygame.image.save(surface, paths[0])
+        # Повторы одного кадра кодируются один раз
+        if len(paths) > 1:
+            with open(paths[0], "rb") as f:
+                encoded = f.read()
+            for path in paths[1:]:
+                with open(path, "wb") as f:
+                    f.write(encoded)
+        busy += time.perf_counter() - start
+        count += len(paths)
+    results.put((count, busy))
+
+
+class FrameWriter:
+    """Пул процессов-кодировщиков с ограниченной очередью: если кодирование не успевает,
+    отрисовка ждёт, а не копит кадры в памяти"""
+
+    def __init__(self, output, workers, queue_size, hold):
+        self.output = output
+        self.hold = hold
+        self.frames = multiprocessing.Queue(maxsize=queue_size)
+        self.results = multiprocessing.Queue()
+        self.workers = [multiprocessing.Process(target=_encode_worker, args=(self.frames, self.results), daemon=True)
+                        for _ in range(workers)]
+        for worker in self.workers:
+            worker.start()
+        self.count = 0
+        self.render_time = 0.0
+        os.makedirs(output, exist_ok=True)
+
+    def write(self, surface, prefix):
+        paths = []
+        for _ in range(self.hold):
+            self.count += 1
+            paths.append(os.path.join(self.output, f"{prefix}_{self.count:06d}.png"))
+        self.frames.put((pygame.image.tostring(surface, "RGB"), surface.get_size(), paths))
+
+    def close(self):
+        for _ in self.workers:
+            self.frames.put(None)
+        stats = [self.results.get() for _ in self.workers]
+        for worker in self.workers:
+            worker.join()
+        return sum(count for count, _ in stats), sum(busy for _, busy in stats)
+
+
+def render_frame(g, writer, prefix):
+    start = time.perf_counter()
+    g.draw_game()
+    writer.render_time += time.perf_counter() - start
+    writer.write(game.screen, prefix)
+
+
+def _clamp(value):
+    # Так же, как TelemetryLog.record укладывает значения в байт
+    return max(-128, min(value, 127))
+
+
+def check_record(g, record, actor):
+    """Здоровье обеих сторон и мана ходящего после действия должны совпасть с записью"""
+    opponent_health = g.enemy_health if g.game_mode == 'bot' else g.player2_health
+    mana = {"player": g.player_mana, "enemy": g.enemy_mana, "player2": g.player2_mana}[actor]
+    actual = (_clamp(g.player_health), _clamp(opponent_health), _clamp(mana))
+    if actual != tuple(record[8:11]):
+        raise ReplayMismatch(f"партия {record[0]:016x}, событие {record[1]}: в журнале здоровье и мана "
+                             f"{tuple(record[8:11])}, при воспроизведении {actual}")
+
+
+def replay_match(events, writer):
+    """Повторить записанную партию через методы Game и отрисовать кадр после каждого действия.
+
+    Каждое действие сверяется с журналом; на первом расхождении бросается ReplayMismatch.
+    """
+    g = game.Game()
+    first = events[0]
+    if first[2] != MATCH_START:
+        return 0
+    g.game_mode = MODES[first[11]] if first[11] < len(MODES) else 'bot'
+    if first[12] < len(DIFFICULTIES):
+        g.bot_difficulty = DIFFICULTIES[first[12]]
+    g.start_game_common()
+    cards = {c.name: c for c in g.full_deck}
+    by_index = [cards[c.name] for c in game.CARDS]
+    prefix = f"{first[0]:016x}"
+
+    hands = {"player": g.player_hand, "enemy": g.enemy_hand, "player2": g.player2_hand}
+    for hand in hands.values():
+        hand.clear()
+    before = writer.count
+    for record in events:
+        event, card, slot, drawn = record[2], record[4], record[5], record[6]
+        actor = ACTORS[record[3]] if record[3] < len(ACTORS) else None
+        where = f"партия {record[0]:016x}, событие {record[1]}"
+        if event == DEAL:
+            hands[actor].append(by_index[drawn])
+            continue
+        if event in (PLAY, SKIP, NO_MOVE):
+            if g.turn != actor:
+                raise ReplayMismatch(f"{where}: в журнале ходит {actor}, при воспроизведении {g.turn}")
+            if event == PLAY:
+                # Отмена хода заменяет списки рук, поэтому берём их у игры заново
+                hand = {"player": g.player_hand, "enemy": g.enemy_hand, "player2": g.player2_hand}[actor]
+                if not 0 <= slot < len(hand) or hand[slot] is not by_index[card]:
+                    raise ReplayMismatch(f"{where}: в слоте {slot} нет карты {game.CARDS[card].name}")
+                # Добор из записи кладётся на верх колоды, чтобы draw_card вернул ту же карту
+                g.deck.append(by_index[drawn])
+                if actor == "player":
+                    g.player_play_card(slot)
+                elif actor == "player2":
+                    g.player2_play_card(slot)
+                else:
+                    g.enemy_play_card(hand[slot])
+            elif event == SKIP:
+                g.skip_turn()
+            else:
+                g.enemy_skip_turn()
+            # Принятое действие всегда передаёт ход
+            if g.turn == actor:
+                raise ReplayMismatch(f"{where}: действие не принято: {g.message}")
+        elif event in (UNDO, REDO, BRANCH):
+            if event == UNDO:
+                g.undo_turn()
+            elif event == REDO:
+                g.redo_turn()
+            else:
+                g.switch_branch(card)
+            if _clamp(g.history.depth) != slot or g.turn != actor:
+                raise ReplayMismatch(f"{where}: переход по истории не совпал с журналом: {g.message}")
+        else:
+            continue
+        check_record(g, record, actor)
+        render_frame(g, writer, prefix)
+    return writer.count - before
+
+
+def simulate_match(writer, difficulty, max_turns=200):
+    """Сыграть партию против бота: игрок разыгрывает самую сильную доступную карту"""
+    g = game.Game()
+    g.bot_difficulty = difficulty
+    g.start_game_bot()
+    prefix = f"sim{time.time_ns():x}"
+    before = writer.count
+    render_frame(g, writer, prefix)
+    while g.turn is not None and g.turn_number <= max_turns:
+        if g.turn == "player":
+            playable = [i for i, c in enumerate(g.player_hand) if c.cost <= g.player_mana]
+            if playable:
+                g.player_play_card(max(playable, key=lambda i: g.player_hand[i].attack))
+            else:
+                g.skip_turn()
+        else:
+            g.enemy_turn()
+        render_frame(g, writer, prefix)
+    return writer.count - before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Отрисовка партий в последовательность кадров без окна")
+    parser.add_argument("logs", nargs="*", help="журналы телеметрии с партиями для воспроизведения")
+    parser.add_argument("--match", help="id партии (hex), по умолчанию — все партии журнала")
+    parser.add_argument("--simulate", type=int, default=0, help="сыграть и отрисовать столько партий против бота")
+    parser.add_argument("--difficulty", default="Сложный")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--workers", type=int, default=max(multiprocessing.cpu_count() - 1, 1))
+    parser.add_argument("--queue-size", type=int, default=16, help="сколько кадров может ждать кодирования")
+    parser.add_argument("--hold", type=int, default=1, help="сколько кадров видео на одно действие")
+    args = parser.parse_args(argv)
+
+    game.init_display()
+    game.init_fonts()
+    start = time.perf_counter()
+    writer = FrameWriter(args.output, args.workers, args.queue_size, args.hold)
+
+    failed = False
+    try:
+        for match_id, events in read_matches(args.logs).items():
+            if args.match is None or int(args.match, 16) == match_id:
+                replay_match(events, writer)
+        for _ in range(args.simulate):
+            simulate_match(writer, args.difficulty)
+    except ReplayMismatch as e:
+        print(f"Воспроизведение остановлено: {e}")
+        failed = True
+
+    frames, busy = writer.close()
+    elapsed = time.perf_counter() - start
+    cores = args.workers + 1
+    fps = frames / elapsed if elapsed > 0 else 0.0
+    print(f"Кадров: {frames} за {elapsed:.2f} с — {fps:.1f} кадров/с, {fps / cores:.1f} кадров/с на ядро "
+          f"({cores} процессов; отрисовка {writer.render_time:.2f} с, кодирование {busy:.2f} с)")
+    pygame.quit()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
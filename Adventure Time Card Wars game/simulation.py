@@ -0,0 +1,134 @@
+import random
+
+from card_data import CARDS, COPIES
+
+MAX_HEALTH = 20
+MAX_MANA = 10
+START_MANA = 5
+HAND_SIZE = 5
+
+
+class Match:
+    """Партия режима «Против бота» без pygame.
+
+    Повторяет правила Game.player_play_card, skip_turn, enemy_turn и end_turn,
+    чтобы инструменты могли быстро разыгрывать тысячи партий.
+    """
+
+    def __init__(self, cards=CARDS, rng=None):
+        self.rng = rng or random.Random()
+        self.full_deck = list(cards) * COPIES
+        self.deck = self.full_deck.copy()
+        self.rng.shuffle(self.deck)
+        self.player_hand = [self.draw_card() for _ in range(HAND_SIZE)]
+        self.enemy_hand = [self.draw_card() for _ in range(HAND_SIZE)]
+        # Game раздаёт руку и второму игроку даже в режиме против бота
+        for _ in range(HAND_SIZE):
+            self.draw_card()
+        self.player_health = MAX_HEALTH
+        self.enemy_health = MAX_HEALTH
+        self.player_mana = START_MANA
+        self.enemy_mana = START_MANA
+        self.turn = "player"
+        self.turn_number = 1
+        self.sword_buff_active = False
+
+    def draw_card(self):
+        if not self.deck:
+            self.deck = self.full_deck.copy()
+            self.rng.shuffle(self.deck)
+        return self.deck.pop()
+
+    @property
+    def winner(self):
+        if self.player_health <= 0:
+            return "enemy"
+        if self.enemy_health <= 0:
+            return "player"
+        return None
+
+    def playable(self, hand, mana):
+        return [c for c in hand if c.cost <= mana]
+
+    def player_play_card(self, card):
+        self.player_mana -= card.cost
+        name_lower = card.name.lower()
+        if "зелье" in name_lower:
+            self.player_health = min(self.player_health + 2, MAX_HEALTH)
+        elif "меч" in name_lower:
+            self.sword_buff_active = True
+        else:
+            damage = card.attack
+            if self.sword_buff_active:
+                damage += 1
+                self.sword_buff_active = False
+            self.enemy_health -= damage
+        self.player_hand.remove(card)
+        self.player_hand.append(self.draw_card())
+        self.player_skip()
+
+    def player_skip(self):
+        self.turn = "enemy"
+        self.enemy_mana = min(self.enemy_mana + self.turn_number, MAX_MANA)
+
+    def enemy_play_card(self, card):
+        self.enemy_mana -= card.cost
+        self.player_health -= max(card.attack - 1, 0)
+        self.enemy_hand.remove(card)
+        self.enemy_hand.append(self.draw_card())
+        self.turn = "player"
+        self.player_mana = min(self.player_mana + self.turn_number, MAX_MANA)
+        self.turn_number += 1
+
+    def enemy_skip(self):
+        self.enemy_mana = min(self.enemy_mana + self.turn_number, MAX_MANA)
+        self.turn = "player"
+        self.turn_number += 1
+
+    def step(self, player_policy, enemy_policy):
+        """Сделать один ход стороны, чья сейчас очередь"""
+        if self.turn == "player":
+            playable = self.playable(self.player_hand, self.player_mana)
+            card = player_policy(self, playable) if playable else None
+            if card is None:
+                self.player_skip()
+            else:
+                self.player_play_card(card)
+        else:
+            playable = self.playable(self.enemy_hand, self.enemy_mana)
+            if playable:
+                # Как и в enemy_turn, бот не может пропустить ход при наличии карт
+                self.enemy_play_card(enemy_policy(self, playable))
+            else:
+                self.enemy_skip()
+
+    def play(self, player_policy, enemy_policy, max_turns=100):
+        """Доиграть партию до конца; None — ничья по лимиту ходов"""
+        while self.winner is None and self.turn_number <= max_turns:
+            self.step(player_policy, enemy_policy)
+        return self.winner
+
+
+# Эвристики сложностей из enemy_turn; годятся для обеих сторон
+def easy_policy(match, playable):
+    return min(playable, key=lambda c: c.cost)
+
+
+def medium_policy(match, playable):
+    return max(playable, key=lambda c: c.attack)
+
+
+def hard_policy(match, playable):
+    return max(playable, key=lambda c: (c.attack / max(c.cost, 1)))
+
+
+def random_policy(match, playable):
+    return match.rng.choice(playable)
+
+
+POLICIES = {
+    "Лёгкий": easy_policy,
+    "Средний": medium_policy,
+    "Сложный": hard_policy,
+    "Случайный": random_policy,
+}
@@ -0,0 +1,451 @@
+import argparse
+import random
+import sys
+import time
+
+MAX_HEALTH = 20
+MAX_MANA = 10
+HAND_SIZE = 5
+SKIP = -1
+
+
+class _Timeout(Exception):
+    pass
+
+
+class Position:
+    """Позиция режима «Против бота» глазами врага: его рука и невидимые ему карты
+    (рука игрока вместе с колодой) хранятся как счётчики по классам карт"""
+
+    __slots__ = ("player_health", "enemy_health", "player_mana", "enemy_mana", "turn_number",
+                 "sword_buff", "player_turn", "enemy_hand", "unseen", "unseen_size")
+
+    def __init__(self, player_health, enemy_health, player_mana, enemy_mana, turn_number,
+                 sword_buff, player_turn, enemy_hand, unseen):
+        self.player_health = player_health
+        self.enemy_health = enemy_health
+        self.player_mana = player_mana
+        self.enemy_mana = enemy_mana
+        self.turn_number = turn_number
+        self.sword_buff = sword_buff
+        self.player_turn = player_turn
+        self.enemy_hand = list(enemy_hand)
+        self.unseen = list(unseen)
+        self.unseen_size = sum(unseen)
+
+    def copy(self):
+        return Position(self.player_health, self.enemy_health, self.player_mana, self.enemy_mana,
+                        self.turn_number, self.sword_buff, self.player_turn, self.enemy_hand, self.unseen)
+
+
+def card_kind(name):
+    # Та же проверка по названию, что и в player_play_card
+    name_lower = name.lower()
+    if "зелье" in name_lower:
+        return "heal"
+    if "меч" in name_lower:
+        return "sword"
+    return None
+
+
+class EndgameSolver:
+    """Доказательный перебор эндшпиля для сложности «Сложный+».
+
+    Ищет вынужденный выигрыш врага: ход, после которого враг побеждает за несколько своих ходов
+    при любых ответах игрока и любом доборе. Руку игрока враг не видит, поэтому ответом считается
+    любая невидимая карта, которую игрок может оплатить, и пропуск хода. Ходы врага — узлы «или»,
+    ответы игрока и доборы — узлы «и», так что перебор обрывается на первом опровержении.
+    Карты с одинаковыми атакой, стоимостью и эффектом сливаются в один класс.
+    Позиции хешируются по Зобристу, результаты хранятся в ограниченной таблице транспозиций
+    между ходами, число ходов врага наращивается итеративно в пределах времени.
+    """
+
+    def __init__(self, cards, table_size=200000, time_budget=0.05, max_moves=3):
+        self.classes = []  # (атака, стоимость, эффект)
+        self.class_of = {}  # название карты -> класс
+        class_index = {}
+        for card in cards:
+            key = (card.attack, card.cost, card_kind(card.name))
+            if key not in class_index:
+                class_index[key] = len(self.classes)
+                self.classes.append(key)
+            self.class_of[card.name] = class_index[key]
+        # Полный состав колоды нужен, когда колода кончается и перемешивается заново
+        self.full_deck = [0] * len(self.classes)
+        for card in cards:
+            self.full_deck[self.class_of[card.name]] += 1
+        # Больше этого враг за один ход не отнимет (урон в enemy_turn — атака минус 1)
+        self.max_damage = max((attack - 1 for attack, _, _ in self.classes), default=0)
+
+        self.table_size = table_size
+        self.time_budget = time_budget
+        self.max_moves = max_moves
+        self.table = {}
+
+        # Ключи Зобриста: фиксированное зерно, чтобы хеши не зависели от запуска
+        rng = random.Random(20240601)
+
+        def keys(n):
+            return [rng.getrandbits(64) for _ in range(n)]
+
+        max_count = max(self.full_deck) * 2 + 8
+        self.z_player_health = keys(MAX_HEALTH + 1)
+        self.z_enemy_health = keys(MAX_HEALTH + 1)
+        self.z_player_mana = keys(MAX_MANA + 1)
+        self.z_enemy_mana = keys(MAX_MANA + 1)
+        self.z_turn = keys(MAX_MANA + 1)
+        self.z_sword = rng.getrandbits(64)
+        self.z_player_turn = rng.getrandbits(64)
+        # Нулевой счётчик не меняет хеш, поэтому отсутствующие карты «бесплатны»
+        self.z_enemy_hand = [[0] + keys(max_count) for _ in self.classes]
+        self.z_unseen = [[0] + keys(max_count) for _ in self.classes]
+
+        self.h = 0
+        self.deadline = 0.0
+        self.nodes = 0
+        self.lookups = 0
+        self.hits = 0
+        self.elapsed = 0.0
+        self.depth_reached = 0
+        self.proven = False
+
+    # === Построение позиции ===
+
+    def counts(self, cards):
+        result = [0] * len(self.classes)
+        for card in cards:
+            result[self.class_of[card.name]] += 1
+        return result
+
+    def position(self, player_health, enemy_health, player_mana, enemy_mana, turn_number,
+                 sword_buff, player_turn, enemy_hand, unseen):
+        """unseen — карты, которых враг не видит: рука игрока и колода вместе"""
+        return Position(player_health, enemy_health, player_mana, enemy_mana, turn_number,
+                        sword_buff, player_turn, self.counts(enemy_hand), self.counts(unseen))
+
+    def is_endgame(self, player_health):
+        """Выигрыш за max_moves ходов врага возможен, только если урона на него хватает"""
+        return player_health <= self.max_moves * self.max_damage
+
+    # === Хеширование ===
+
+    @staticmethod
+    def _turn_bucket(turn_number):
+        # После 10-го хода прирост маны всегда упирается в максимум
+        return min(turn_number, MAX_MANA)
+
+    def hash(self, pos):
+        h = (self.z_player_health[max(pos.player_health, 0)]
+             ^ self.z_enemy_health[max(pos.enemy_health, 0)]
+             ^ self.z_player_mana[pos.player_mana]
+             ^ self.z_enemy_mana[pos.enemy_mana]
+             ^ self.z_turn[self._turn_bucket(pos.turn_number)])
+        if pos.sword_buff:
+            h ^= self.z_sword
+        if pos.player_turn:
+            h ^= self.z_player_turn
+        for t in range(len(self.classes)):
+            h ^= self.z_enemy_hand[t][pos.enemy_hand[t]]
+            h ^= self.z_unseen[t][pos.unseen[t]]
+        return h
+
+    # === Таблица транспозиций ===
+
+    def _lookup(self, moves_left):
+        """Выигрыш, доказанный за меньшее число ходов, верен и для большего; опровержение — наоборот"""
+        self.lookups += 1
+        entry = self.table.get(self.h)
+        if entry is not None:
+            won, moves = entry
+            if moves <= moves_left if won else moves >= moves_left:
+                self.hits += 1
+                return won
+        return None
+
+    def _store(self, key, moves_left, won):
+        table = self.table
+        if key not in table and len(table) >= self.table_size:
+            # Вытесняем самую старую запись
+            del table[next(iter(table))]
+        table[key] = (won, moves_left)
+
+    def clear(self):
+        self.table.clear()
+
+    # === Перебор ===
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise _Timeout
+
+    def _enemy_moves(self, pos):
+        playable = [t for t in range(len(self.classes)) if pos.enemy_hand[t] and self.classes[t][1] <= pos.enemy_mana]
+        if not playable:
+            return [SKIP]
+        # Карты без урона не приближают выигрыш; сначала пробуем самые сильные удары
+        attacking = sorted((t for t in playable if self.classes[t][0] > 1), key=lambda t: -self.classes[t][0])
+        return attacking or playable
+
+    def _player_replies(self, pos):
+        replies = [t for t in range(len(self.classes)) if pos.unseen[t] and self.classes[t][1] <= pos.player_mana]
+        # Сначала ответы, которые скорее всего опровергнут выигрыш: лечение и сильные удары
+        replies.sort(key=lambda t: (self.classes[t][2] != "heal", -self.classes[t][0]))
+        return replies + [SKIP]
+
+    def _enemy_node(self, pos, moves_left):
+        self._tick()
+        known = self._lookup(moves_left)
+        if known is not None:
+            return known
+        key = self.h
+        won = any(self._enemy_move(pos, t, moves_left) for t in self._enemy_moves(pos))
+        self._store(key, moves_left, won)
+        return won
+
+    def _player_node(self, pos, moves_left):
+        self._tick()
+        known = self._lookup(moves_left)
+        if known is not None:
+            return known
+        key = self.h
+        won = all(self._player_reply(pos, t, moves_left) for t in self._player_replies(pos))
+        self._store(key, moves_left, won)
+        return won
+
+    def _enemy_move(self, pos, move, moves_left):
+        """Выигрывает ли враг, сыграв move, если у него осталось moves_left ходов вместе с этим"""
+        if move == SKIP:
+            return moves_left > 1 and self._pass_turn(pos, moves_left - 1, played=False)
+
+        attack, cost, _ = self.classes[move]
+        old_h = self.h
+        old_player_health, old_enemy_mana = pos.player_health, pos.enemy_mana
+        hand, zhand = pos.enemy_hand, self.z_enemy_hand[move]
+        pos.enemy_mana -= cost
+        pos.player_health -= max(attack - 1, 0)
+        self.h ^= (self.z_player_health[old_player_health] ^ self.z_player_health[max(pos.player_health, 0)]
+                   ^ self.z_enemy_mana[old_enemy_mana] ^ self.z_enemy_mana[pos.enemy_mana]
+                   ^ zhand[hand[move]] ^ zhand[hand[move] - 1])
+        hand[move] -= 1
+
+        if pos.player_health <= 0:
+            won = True
+        elif moves_left == 1:
+            won = False
+        else:
+            won = self._enemy_draws(pos, moves_left - 1)
+
+        hand[move] += 1
+        pos.player_health, pos.enemy_mana = old_player_health, old_enemy_mana
+        self.h = old_h
+        return won
+
+    def _enemy_draws(self, pos, moves_left):
+        """Выигрыш должен держаться при любом доборе"""
+        # Какие невидимые карты лежат в колоде, а какие в руке игрока, враг не знает,
+        # поэтому добраться может любая из них. Закончившаяся колода перемешивается заново;
+        # упрощённо добираем из полного состава, не меняя счётчики невидимых карт
+        pool = pos.unseen
+        reshuffled = pos.unseen_size <= HAND_SIZE
+        if reshuffled:
+            pool = self.full_deck
+
+        hand = pos.enemy_hand
+        base_h = self.h
+        won = True
+        for t, count in enumerate(pool):
+            if not count:
+                continue
+            zt = self.z_enemy_hand[t]
+            self.h = base_h ^ zt[hand[t]] ^ zt[hand[t] + 1]
+            hand[t] += 1
+            if not reshuffled:
+                self.h ^= self.z_unseen[t][count] ^ self.z_unseen[t][count - 1]
+                pool[t] -= 1
+                pos.unseen_size -= 1
+            won = self._pass_turn(pos, moves_left, played=True)
+            if not reshuffled:
+                pool[t] += 1
+                pos.unseen_size += 1
+            hand[t] -= 1
+            if not won:
+                break
+        self.h = base_h
+        return won
+
+    def _player_reply(self, pos, move, moves_left):
+        """Выигрывает ли враг после ответа игрока move"""
+        if move == SKIP:
+            return self._pass_turn(pos, moves_left, played=False)
+
+        attack, cost, kind = self.classes[move]
+        old_h = self.h
+        old_player_health, old_enemy_health = pos.player_health, pos.enemy_health
+        old_player_mana, old_sword = pos.player_mana, pos.sword_buff
+        pos.player_mana -= cost
+        if kind == "heal":
+            pos.player_health = min(pos.player_health + 2, MAX_HEALTH)
+        elif kind == "sword":
+            pos.sword_buff = True
+        else:
+            pos.enemy_health -= attack + (1 if pos.sword_buff else 0)
+            pos.sword_buff = False
+        # Сыгранная карта становится видна врагу; добор игрока остаётся невидимым
+        zt = self.z_unseen[move]
+        self.h ^= (self.z_player_health[old_player_health] ^ self.z_player_health[pos.player_health]
+                   ^ self.z_enemy_health[old_enemy_health] ^ self.z_enemy_health[max(pos.enemy_health, 0)]
+                   ^ self.z_player_mana[old_player_mana] ^ self.z_player_mana[pos.player_mana]
+                   ^ zt[pos.unseen[move]] ^ zt[pos.unseen[move] - 1])
+        if pos.sword_buff != old_sword:
+            self.h ^= self.z_sword
+        pos.unseen[move] -= 1
+        pos.unseen_size -= 1
+
+        won = pos.enemy_health > 0 and self._pass_turn(pos, moves_left, played=True)
+
+        pos.unseen[move] += 1
+        pos.unseen_size += 1
+        pos.player_health, pos.enemy_health = old_player_health, old_enemy_health
+        pos.player_mana, pos.sword_buff = old_player_mana, old_sword
+        self.h = old_h
+        return won
+
+    def _pass_turn(self, pos, moves_left, played):
+        """Передача хода так же, как в end_turn / skip_turn / enemy_turn"""
+        old_h = self.h
+        old_player_mana, old_enemy_mana, old_turn = pos.player_mana, pos.enemy_mana, pos.turn_number
+        bucket = self._turn_bucket(pos.turn_number)
+        if pos.player_turn:
+            new_mana = min(pos.enemy_mana + pos.turn_number, MAX_MANA)
+            self.h ^= self.z_enemy_mana[pos.enemy_mana] ^ self.z_enemy_mana[new_mana]
+            pos.enemy_mana = new_mana
+        else:
+            if played:
+                new_mana = min(pos.player_mana + pos.turn_number, MAX_MANA)
+                self.h ^= self.z_player_mana[pos.player_mana] ^ self.z_player_mana[new_mana]
+                pos.player_mana = new_mana
+            else:
+                new_mana = min(pos.enemy_mana + pos.turn_number, MAX_MANA)
+                self.h ^= self.z_enemy_mana[pos.enemy_mana] ^ self.z_enemy_mana[new_mana]
+                pos.enemy_mana = new_mana
+            pos.turn_number += 1
+            self.h ^= self.z_turn[bucket] ^ self.z_turn[self._turn_bucket(pos.turn_number)]
+        pos.player_turn = not pos.player_turn
+        self.h ^= self.z_player_turn
+        if pos.player_turn:
+            won = self._player_node(pos, moves_left)
+        else:
+            won = self._enemy_node(pos, moves_left)
+
+        pos.player_turn = not pos.player_turn
+        pos.player_mana, pos.enemy_mana, pos.turn_number = old_player_mana, old_enemy_mana, old_turn
+        self.h = old_h
+        return won
+
+    # === Выбор хода ===
+
+    def choose_card(self, position, playable_cards):
+        """Карта из playable_cards, с которой выигрыш врага доказан, или None.
+
+        Первая итерация — проверка смертельного удара без перебора; дальше число ходов врага
+        растёт, пока не кончится время. Если выигрыш не доказан, ход выбирает обычная эвристика.
+        """
+        start = time.perf_counter()
+        self.deadline = start + self.time_budget
+        self.nodes = self.lookups = self.hits = 0
+        self.depth_reached = 0
+        self.proven = False
+
+        pos = position.copy()
+        self.h = self.hash(pos)
+        moves = self._enemy_moves(pos)
+        winning = None
+        for moves_left in range(1, self.max_moves + 1):
+            try:
+                winning = next((move for move in moves if self._enemy_move(pos, move, moves_left)), None)
+            except _Timeout:
+                break
+            self.depth_reached = moves_left
+            if winning is not None:
+                self.proven = True
+                break
+        self.elapsed = time.perf_counter() - start
+
+        if winning is None or winning == SKIP:
+            return None
+        for card in playable_cards:
+            if self.class_of[card.name] == winning:
+                return card
+        return None
+
+    def stats(self):
+        return {
+            "nodes": self.nodes,
+            "nodes_per_second": self.nodes / self.elapsed if self.elapsed > 0 else 0.0,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "table_entries": len(self.table),
+            "depth": self.depth_reached,
+            "proven": self.proven,
+            "elapsed": self.elapsed,
+        }
+
+    def report(self):
+        s = self.stats()
+        status = "выигрыш доказан" if s["proven"] else "выигрыша нет"
+        return (f"Решатель эндшпиля: {status} за {s['depth']} ход(а), {s['nodes']} узлов, "
+                f"{s['elapsed'] * 1000:.0f} мс, попадания в таблицу {s['hit_rate']:.0%}, записей {s['table_entries']}")
+
+
+# === Сравнение со «Сложным» ===
+
+def _solver_policy(solver):
+    from simulation import hard_policy
+
+    def choose(match, playable):
+        if solver.is_endgame(match.player_health):
+            position = solver.position(match.player_health, match.enemy_health, match.player_mana,
+                                       match.enemy_mana, match.turn_number, match.sword_buff_active, False,
+                                       match.enemy_hand, match.player_hand + match.deck)
+            card = solver.choose_card(position, playable)
+            if card is not None:
+                return card
+        return hard_policy(match, playable)
+    return choose
+
+
+def main(argv=None):
+    from card_data import CARDS, COPIES
+    from simulation import Match, POLICIES
+
+    parser = argparse.ArgumentParser(description="Сравнить «Сложный+» со «Сложным» на одинаковых раздачах")
+    parser.add_argument("--games", type=int, default=300, help="партий против каждой политики игрока")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    solver = EndgameSolver(list(CARDS) * COPIES)
+    hard_plus = _solver_policy(solver)
+    calls = proven = 0
+    slowest = 0.0
+    for name, player_policy in POLICIES.items():
+        wins = {"Сложный": 0, "Сложный+": 0}
+        for game in range(args.games):
+            seed = args.seed * 1_000_003 + game
+            wins["Сложный"] += Match(CARDS, random.Random(seed)).play(player_policy, POLICIES["Сложный"]) == "enemy"
+            solver.clear()
+            match = Match(CARDS, random.Random(seed))
+            while match.winner is None and match.turn_number <= 100:
+                before = solver.nodes, solver.elapsed
+                match.step(player_policy, hard_plus)
+                if (solver.nodes, solver.elapsed) != before:
+                    calls += 1
+                    proven += solver.proven
+                    slowest = max(slowest, solver.elapsed)
+            wins["Сложный+"] += match.winner == "enemy"
+        print(f"Против «{name}»: Сложный {wins['Сложный'] / args.games:.1%}, "
+              f"Сложный+ {wins['Сложный+'] / args.games:.1%} побед бота из {args.games}")
+    print(f"Перебор: {calls} вызовов, доказано {proven}, самый долгий {slowest * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
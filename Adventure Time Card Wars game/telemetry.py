@@ -0,0 +1,134 @@
+import os
+import queue
+import random
+import struct
+import threading
+import time
+
+from card_data import CARDS
+
+# Заголовок файла журнала: магия и версия формата
+FILE_MAGIC = b"ATCWLOG1"
+# match_id, seq, событие, кто, карта, слот в руке, добранная карта, номер хода,
+# здоровье игрока, здоровье соперника, мана ходящего, режим, сложность, время.
+# У отмены, повтора и переключения ветки: слот — глубина хода в истории после действия,
+# карта — шаг переключения ветки
+RECORD = struct.Struct("<QHBBbbbHbbbBBI")
+
+MATCH_START = 0
+DEAL = 1
+PLAY = 2
+SKIP = 3  # пропуск кнопкой «Пропустить ход» (skip_turn)
+MATCH_END = 4
+UNDO = 5
+REDO = 6
+BRANCH = 7
+NO_MOVE = 8  # бот пропускает ход, потому что ему нечем сыграть (enemy_skip_turn)
+HISTORY_EVENTS = (UNDO, REDO, BRANCH)
+
+ACTORS = ["player", "enemy", "player2"]
+MODES = ["bot", "2players"]
+DIFFICULTIES = ["Лёгкий", "Средний", "Сложный", "Сложный+", "Сильный", "Обученный"]
+UNKNOWN = 255
+
+CARD_INDEX = {c.name: i for i, c in enumerate(CARDS)}
+
+
+class TelemetryLog:
+    """Журнал действий партий: только дозапись, записи фиксированного размера.
+
+    События копятся в буфере главного потока и пачками уходят в фоновый поток,
+    который дописывает их в файл сессии, поэтому игра не ждёт диска.
+    """
+
+    def __init__(self, folder="telemetry", batch_size=256):
+        # folder=None — журнал выключен (например, при воспроизведении записанных партий)
+        self.enabled = folder is not None
+        self.folder = folder
+        self.batch_size = batch_size
+        self.buffer = bytearray()
+        self.pending = 0
+        self.match_id = 0
+        self.seq = 0
+        self.mode = UNKNOWN
+        self.difficulty = UNKNOWN
+        self.queue = queue.Queue()
+        self.writer = None
+        if self.enabled:
+            self.path = os.path.join(folder, f"session-{int(time.time())}-{os.getpid()}.bin")
+            self.writer = threading.Thread(target=self._write_loop, daemon=True)
+            self.writer.start()
+
+    def _write_loop(self):
+        f = None
+        while True:
+            chunk = self.queue.get()
+            if chunk is None:
+                break
+            try:
+                if f is None:
+                    os.makedirs(self.folder, exist_ok=True)
+                    f = open(self.path, "ab")
+                    if f.tell() == 0:
+                        f.write(FILE_MAGIC)
+                f.write(chunk)
+                f.flush()
+            except OSError as e:
+                print(f"Не удалось записать телеметрию: {e}")
+        if f is not None:
+            f.close()
+
+    def record(self, event, actor, turn_number, player_health, opponent_health, mana,
+               card=None, slot=-1, drawn=None):
+        if not self.enabled:
+            return
+        self._append(event, actor, turn_number, player_health, opponent_health, mana,
+                     CARD_INDEX.get(card.name, -1) if card is not None else -1, slot,
+                     CARD_INDEX.get(drawn.name, -1) if drawn is not None else -1)
+
+    def record_history(self, event, actor, turn_number, player_health, opponent_health, mana, depth, step=0):
+        """Отмена, повтор или переключение ветки; состояние — уже после перехода"""
+        if not self.enabled:
+            return
+        self._append(event, actor, turn_number, player_health, opponent_health, mana,
+                     step, min(depth, 127), -1)
+
+    def _append(self, event, actor, turn_number, player_health, opponent_health, mana, card, slot, drawn):
+        self.buffer += RECORD.pack(
+            self.match_id, self.seq, event, ACTORS.index(actor) if actor in ACTORS else UNKNOWN,
+            card, slot, drawn,
+            min(turn_number, 0xFFFF), max(-128, min(player_health, 127)),
+            max(-128, min(opponent_health, 127)), max(-128, min(mana, 127)),
+            self.mode, self.difficulty, int(time.time()))
+        self.seq = (self.seq + 1) & 0xFFFF
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def start_match(self, mode, difficulty, hands, health, mana):
+        """Новая партия: событие начала и раздача стартовых рук (actor -> карты)"""
+        self.match_id = random.getrandbits(64)
+        self.seq = 0
+        self.mode = MODES.index(mode) if mode in MODES else UNKNOWN
+        self.difficulty = DIFFICULTIES.index(difficulty) if difficulty in DIFFICULTIES else UNKNOWN
+        self.record(MATCH_START, "player", 1, health, health, mana)
+        for actor, hand in hands.items():
+            for slot, card in enumerate(hand):
+                self.record(DEAL, actor, 1, health, health, mana, drawn=card, slot=slot)
+
+    def end_match(self, winner, turn_number, player_health, opponent_health):
+        self.record(MATCH_END, winner, turn_number, player_health, opponent_health, 0)
+        self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.queue.put(bytes(self.buffer))
+            self.buffer.clear()
+            self.pending = 0
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.flush()
+        self.queue.put(None)
+        self.writer.join(timeout=2)
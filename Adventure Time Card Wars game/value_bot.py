@@ -0,0 +1,202 @@
+import argparse
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from card_data import CARDS
+from policy_table import cards_checksum
+from simulation import MAX_HEALTH, MAX_MANA, Match, POLICIES
+
+DEFAULT_PATH = "value_model.npz"
+CHECKPOINT_FOLDER = "checkpoints"
+FEATURES = [
+    "смещение", "здоровье игрока", "здоровье врага", "разница здоровья", "мана врага",
+    "мана игрока", "ход", "меч игрока", "смертельный удар", "атака остатка руки", "урон", "стоимость",
+]
+
+
+def extract_features(player_health, enemy_health, player_mana, enemy_mana, turn_number,
+                     sword_buff, attack, cost, hand_attack):
+    """Признаки позиции после розыгрыша карты врагом; все аргументы — массивы одной длины.
+
+    Работает сразу для всех кандидатов одного хода и для целых пачек позиций при обучении.
+    """
+    player_health = np.asarray(player_health, dtype=np.float32)
+    attack = np.asarray(attack, dtype=np.float32)
+    cost = np.asarray(cost, dtype=np.float32)
+    turn_number = np.asarray(turn_number, dtype=np.float32)
+    damage = np.maximum(attack - 1, 0)  # как в enemy_turn
+    player_after = player_health - damage
+    enemy_health = np.asarray(enemy_health, dtype=np.float32)
+    return np.stack([
+        np.ones_like(player_after),
+        player_after / MAX_HEALTH,
+        enemy_health / MAX_HEALTH,
+        (enemy_health - player_after) / MAX_HEALTH,
+        (np.asarray(enemy_mana, dtype=np.float32) - cost) / MAX_MANA,
+        np.minimum(np.asarray(player_mana, dtype=np.float32) + turn_number, MAX_MANA) / MAX_MANA,
+        np.minimum(turn_number, MAX_MANA) / MAX_MANA,
+        np.asarray(sword_buff, dtype=np.float32),
+        (player_after <= 0).astype(np.float32),
+        (np.asarray(hand_attack, dtype=np.float32) - attack) / 30,
+        damage / 6,
+        cost / 6,
+    ], axis=1)
+
+
+class ValueModel:
+    """Логистическая оценка шанса победы врага по признакам позиции после его хода"""
+
+    def __init__(self, weights=None, mean=None, std=None, generation=0):
+        n = len(FEATURES)
+        self.weights = np.zeros(n, dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+        self.mean = np.zeros(n, dtype=np.float32) if mean is None else np.asarray(mean, dtype=np.float32)
+        self.std = np.ones(n, dtype=np.float32) if std is None else np.asarray(std, dtype=np.float32)
+        self.generation = generation
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH, cards=CARDS):
+        """Загрузить модель; None, если файла нет или она обучена на других картах"""
+        if not os.path.exists(path):
+            return None
+        try:
+            data = np.load(path)
+            if int(data["checksum"]) != cards_checksum(cards):
+                print(f"Модель {path} обучена на других характеристиках карт, переобучите её: python value_bot.py")
+                return None
+            return cls(data["weights"], data["mean"], data["std"], int(data["generation"]))
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Не удалось загрузить модель {path}: {e}")
+            return None
+
+    def save(self, path):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, weights=self.weights, mean=self.mean, std=self.std,
+                 generation=self.generation, checksum=cards_checksum(), features=np.array(FEATURES))
+        os.replace(tmp_path, path)
+
+    def predict(self, features):
+        z = ((features - self.mean) / self.std) @ self.weights
+        return 1 / (1 + np.exp(-z))
+
+    def scores(self, candidates):
+        """Оценки всех кандидатов одним векторным вызовом; candidates — строки сырых полей"""
+        return self.predict(extract_features(*np.asarray(candidates, dtype=np.float32).T))
+
+    def choose_card(self, playable_cards, hand, player_health, enemy_health, player_mana, enemy_mana,
+                    turn_number, sword_buff):
+        hand_attack = sum(c.attack for c in hand)
+        candidates = [(player_health, enemy_health, player_mana, enemy_mana, turn_number, sword_buff,
+                       c.attack, c.cost, hand_attack) for c in playable_cards]
+        return playable_cards[int(np.argmax(self.scores(candidates)))]
+
+    def fit(self, features, outcomes, steps=300, learning_rate=0.5, l2=1e-3):
+        """Логистическая регрессия полным градиентным спуском по пачке позиций"""
+        self.mean = features.mean(axis=0)
+        self.std = features.std(axis=0)
+        self.mean[0], self.std[0] = 0.0, 1.0  # смещение не нормируем
+        self.std[self.std < 1e-6] = 1.0
+        x = (features - self.mean) / self.std
+        for _ in range(steps):
+            p = 1 / (1 + np.exp(-(x @ self.weights)))
+            gradient = x.T @ (p - outcomes) / len(outcomes) + l2 * self.weights
+            self.weights -= learning_rate * gradient.astype(np.float32)
+        p = 1 / (1 + np.exp(-(x @ self.weights)))
+        eps = 1e-6
+        return float(-np.mean(outcomes * np.log(p + eps) + (1 - outcomes) * np.log(1 - p + eps)))
+
+
+# === Самоигра ===
+
+def _self_play(args):
+    """Сыграть пачку партий текущей моделью за врага; вернуть сырые позиции и исходы"""
+    weights, mean, std, games, epsilon, seed = args
+    model = ValueModel(weights, mean, std)
+    rng = random.Random(seed)
+    player_policies = list(POLICIES.values())
+    rows = []
+    outcomes = []
+    wins = 0
+
+    for game in range(games):
+        match = Match(CARDS, random.Random(seed * 1_000_003 + game))
+        positions = []
+
+        def enemy_policy(m, playable):
+            hand_attack = sum(c.attack for c in m.enemy_hand)
+            candidates = [(m.player_health, m.enemy_health, m.player_mana, m.enemy_mana, m.turn_number,
+                           m.sword_buff_active, c.attack, c.cost, hand_attack) for c in playable]
+            if rng.random() < epsilon:
+                i = rng.randrange(len(playable))
+            else:
+                i = int(np.argmax(model.scores(candidates)))
+            positions.append(candidates[i])
+            return playable[i]
+
+        winner = match.play(rng.choice(player_policies), enemy_policy)
+        outcome = 1.0 if winner == "enemy" else 0.5 if winner is None else 0.0
+        wins += winner == "enemy"
+        rows.extend(positions)
+        outcomes.extend([outcome] * len(positions))
+    return rows, outcomes, wins, games
+
+
+def train(generations=10, games=2000, workers=None, epsilon=0.1, buffer_size=200000, seed=0, path=DEFAULT_PATH):
+    model = ValueModel.load(path) or ValueModel()
+    os.makedirs(CHECKPOINT_FOLDER, exist_ok=True)
+    rows = np.zeros((0, 9), dtype=np.float32)
+    outcomes = np.zeros(0, dtype=np.float32)
+
+    workers = workers or os.cpu_count() or 1
+    # Несколько пачек на процесс, чтобы быстрые процессы не простаивали; партии делятся без остатка
+    n_jobs = max(min(workers * 4, games), 1)
+    per_job, extra = divmod(games, n_jobs)
+    with Pool(workers) as pool:
+        for generation in range(model.generation + 1, model.generation + generations + 1):
+            start = time.perf_counter()
+            jobs = [(model.weights, model.mean, model.std, per_job + (j < extra), epsilon,
+                     seed * 100_003 + generation * 1009 + j) for j in range(n_jobs)]
+            wins = played = 0
+            batch_rows = []
+            batch_outcomes = []
+            for r, o, w, g in pool.imap_unordered(_self_play, jobs):
+                batch_rows.extend(r)
+                batch_outcomes.extend(o)
+                wins += w
+                played += g
+
+            if not batch_rows:
+                print(f"Поколение {generation}: самоигра не дала позиций, модель не обновлена")
+                continue
+            # Буфер последних позиций: признаки извлекаются одним векторным вызовом на всю пачку
+            rows = np.concatenate([rows, np.asarray(batch_rows, dtype=np.float32)])[-buffer_size:]
+            outcomes = np.concatenate([outcomes, np.asarray(batch_outcomes, dtype=np.float32)])[-buffer_size:]
+            features = extract_features(*rows.T)
+            loss = model.fit(features, outcomes)
+            model.generation = generation
+
+            model.save(os.path.join(CHECKPOINT_FOLDER, f"value_model_{generation:03d}.npz"))
+            model.save(path)
+            print(f"Поколение {generation}: побед врага {wins / max(played, 1):.1%} из {played}, "
+                  f"позиций {len(rows)}, потери {loss:.4f}, {time.perf_counter() - start:.1f} с")
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Обучение оценочной функции бота самоигрой")
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--games", type=int, default=2000, help="партий самоигры на поколение")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию — все ядра)")
+    parser.add_argument("--epsilon", type=float, default=0.1, help="доля случайных ходов для исследования")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+    train(args.generations, args.games, args.workers, args.epsilon, seed=args.seed, path=args.output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())